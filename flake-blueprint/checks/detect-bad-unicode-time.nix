@@ -0,0 +1,68 @@
+# SPDX-License-Identifier: CC0-1.0
+# SPDX-FileCopyrightText: 2026 Jason Yundt <jason@jasonyundt.email>
+#
+# detect-bad-unicode reports a column number for each bad code point that
+# it finds. At one point, it measured the start of a line over and over
+# again while doing that, so a long line with a lot of bad code points in
+# it took hours to check. This check makes sure that a file like that
+# still gets checked in a reasonable amount of time.
+{
+  perSystem,
+  pkgs,
+  pname,
+  ...
+}:
+let
+  # The number of U+E000 characters (a private-use code point) in the line
+  # that gets checked. Each one takes up three bytes in UTF-8, so the file
+  # ends up being about 1 MiB.
+  characterCount = 349525;
+  # The maximum number of seconds that checking the file is allowed to
+  # take. Checking it takes about 5 s on a typical machine. This is much
+  # higher than that so that this check doesn’t fail on slow or busy
+  # machines, but it’s still much lower than the hours that checking the
+  # file would take if the time that it takes to check a line grew
+  # quadratically with the line’s length.
+  budget = 60;
+in
+pkgs.runCommand pname
+  {
+    nativeBuildInputs = [
+      perSystem.self.jasons-pre-commit-hooks
+    ];
+  }
+  ''
+    set -o errexit -o nounset -o pipefail
+
+    printf '%*s' ${toString characterCount} "" \
+      | LC_ALL=C sed 's/ /\xee\x80\x80/g' \
+      > long-line.txt
+
+    start="$(date +%s%N)"
+    # detect-bad-unicode is supposed to exit with a non-zero exit status
+    # here since the file is full of bad code points.
+    if detect-bad-unicode --no-cache --jobs 1 long-line.txt 2> errors; then
+      echo "ERROR: detect-bad-unicode didn’t find any bad code points." 1>&2
+      exit 1
+    fi
+    end="$(date +%s%N)"
+
+    error_count="$(grep --count '^ERROR: ' errors)"
+    if [ "$error_count" -ne ${toString characterCount} ]; then
+      echo \
+        "ERROR: detect-bad-unicode reported $error_count errors instead" \
+        "of ${toString characterCount}." \
+        1>&2
+      exit 1
+    fi
+
+    elapsed_ms="$(( (end - start) / 1000000 ))"
+    echo "detect-bad-unicode took $elapsed_ms ms."
+    if [ "$elapsed_ms" -gt ${toString (budget * 1000)} ]; then
+      echo \
+        "ERROR: detect-bad-unicode took longer than ${toString budget} s." \
+        1>&2
+      exit 1
+    fi
+    touch "$out"
+  ''
@@ -0,0 +1,97 @@
+# SPDX-License-Identifier: CC0-1.0
+# SPDX-FileCopyrightText: 2026 Jason Yundt <jason@jasonyundt.email>
+#
+# Pre-commit hooks often get run on commits that only change a few files.
+# When that happens, most of a hook’s run time is spent importing modules.
+# This check makes sure that each of the console scripts in pyproject.toml
+# doesn’t take too long to import its module.
+{
+  flake,
+  perSystem,
+  pkgs,
+  pname,
+}:
+let
+  inherit (pkgs) lib;
+  pyproject = lib.importTOML "${flake}/pyproject.toml";
+  # The maximum number of microseconds that importing a console script’s
+  # module (including everything that it imports) is allowed to take. The
+  # modules take between 55 ms and 110 ms to import on a typical machine.
+  # This is a little more than twice as long as the slowest of those so
+  # that this check doesn’t fail on slow or busy machines.
+  budget = 250000;
+  # Modules that are slow to import and that only get used by some of the
+  # things that the console scripts do. Running a console script with
+  # --help shouldn’t import any of them.
+  forbiddenModules = [
+    "yaml"
+    "importlib.resources"
+  ];
+  checkConsoleScript =
+    name: entryPoint:
+    let
+      module = builtins.head (lib.strings.splitString ":" entryPoint);
+    in
+    ''
+      check_import_time ${
+        lib.strings.escapeShellArgs [
+          name
+          module
+        ]
+      }
+    '';
+in
+pkgs.runCommand pname
+  {
+    nativeBuildInputs = [
+      perSystem.self.jasons-pre-commit-hooks
+    ];
+  }
+  ''
+    set -o errexit -o nounset -o pipefail
+
+    function check_import_time {
+      local -r script="$1"
+      local -r module="$2"
+      # PYTHONPROFILEIMPORTTIME does the same thing as “python -X importtime”,
+      # but it also works when the Python interpreter gets run by a wrapper
+      # script.
+      PYTHONPROFILEIMPORTTIME=1 "$script" --help > /dev/null 2> import-times
+      local import_time
+      import_time="$(
+        awk \
+          -F '|' \
+          -v module="$module" \
+          '{ name = $3; gsub(/ /, "", name) } name == module { print $2 + 0 }' \
+          import-times
+      )"
+      if [ -z "$import_time" ]; then
+        echo "ERROR: $script didn’t import $module." 1>&2
+        exit 1
+      fi
+      echo "$script: importing $module took $import_time μs."
+      local forbidden_module
+      for forbidden_module in ${lib.strings.escapeShellArgs forbiddenModules}; do
+        if
+          awk \
+            -F '|' \
+            -v module="$forbidden_module" \
+            '{ gsub(/ /, "", $3) } $3 == module { found = 1 } END { exit !found }' \
+            import-times
+        then
+          echo "ERROR: $script imported $forbidden_module." 1>&2
+          exit 1
+        fi
+      done
+      if [ "$import_time" -gt ${toString budget} ]; then
+        echo \
+          "ERROR: $script took longer than ${toString budget} μs to import" \
+          "$module." \
+          1>&2
+        exit 1
+      fi
+    }
+
+    ${lib.strings.concatStrings (lib.attrsets.mapAttrsToList checkConsoleScript pyproject.project.scripts)}
+    touch "$out"
+  ''
@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: CC0-1.0
-# SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-disable
+# SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-enable
 import collections.abc
 import contextlib
 import io
@@ -9,8 +11,9 @@ import os
 import pathlib
 import re
 import sys
+import time
 import warnings
-from typing import Final
+from typing import Callable, Final, NamedTuple, Optional, Self, TypeVar
 
 import dulwich.repo
 
@@ -53,23 +56,200 @@ def make_stdout_stderr_handle_errors_better() -> None:
             )
 
 
+def open_repo(
+    path: pathlib.Path
+) -> contextlib.closing[dulwich.repo.Repo]:
+    return contextlib.closing(dulwich.repo.Repo(str(path)))
+
+
 def open_cwd_as_repo() -> contextlib.closing[dulwich.repo.Repo]:
-    CWD: Final = str(pathlib.Path.cwd())
-    return contextlib.closing(dulwich.repo.Repo(CWD))
+    return open_repo(pathlib.Path.cwd())
 
 
 def paths_in_repo(
-    ignore_patterns: collections.abc.Iterable[re.Pattern[str]] = ()
+    ignore_patterns: collections.abc.Iterable[re.Pattern[str]] = (),
+    repo_path: Optional[pathlib.Path] = None
 ) -> collections.abc.Iterable[pathlib.Path]:
+    """
+    List the paths in a repo’s index.
+
+    If repo_path is None, then the current working directory gets used.
+    """
+    if repo_path is None:
+        repo_path = pathlib.Path.cwd()
     # I would have used dulwich.porcelain.ls_files(), but that function
     # isn’t typed.
     repo: dulwich.repo.Repo
-    with open_cwd_as_repo() as repo:
-        for byte_path in repo.open_index():
-            path = pathlib.Path(os.fsdecode(byte_path))
-            path_string = str(path)
-            for ignore_pattern in ignore_patterns:
-                if ignore_pattern.fullmatch(path_string):
-                    break
-            else:
-                yield pathlib.Path(os.fsdecode(byte_path))
+    with open_repo(repo_path) as repo:
+        yield from without_ignored_paths(
+            repo.open_index(),
+            ignore_patterns
+        )
+
+
+def without_ignored_paths(
+    byte_paths: collections.abc.Iterable[bytes],
+    ignore_patterns: collections.abc.Iterable[re.Pattern[str]]
+) -> collections.abc.Iterable[pathlib.Path]:
+    IGNORE_PATTERNS: Final = tuple(ignore_patterns)
+    for byte_path in byte_paths:
+        path = pathlib.Path(os.fsdecode(byte_path))
+        path_string = str(path)
+        for ignore_pattern in IGNORE_PATTERNS:
+            if ignore_pattern.fullmatch(path_string):
+                break
+        else:
+            yield path
+
+
+def positive_int(string: str) -> int:
+    """
+    Convert a command-line argument into an int that’s at least one.
+
+    This is meant to be used as the type of an argparse argument.
+    """
+    value: int = int(string)
+    if value < 1:
+        raise ValueError(f"{value} is less than one.")
+    return value
+
+
+def default_job_count() -> int:
+    return os.cpu_count() or 1
+
+
+Item = TypeVar('Item')
+Result = TypeVar('Result')
+def map_in_parallel(
+    function: Callable[[Item], Result],
+    items: collections.abc.Sequence[Item],
+    jobs: int
+) -> collections.abc.Iterator[Result]:
+    """
+    Call function on each item using a pool of worker processes.
+
+    Results are yielded in the same order as items, no matter which
+    worker process finishes first. function has to be a module-level
+    function so that it can be pickled.
+    """
+    WORKER_COUNT: Final = min(jobs, len(items))
+    if WORKER_COUNT <= 1:
+        yield from map(function, items)
+    else:
+        # This is imported here so that hooks that only check a few
+        # files don’t have to spend time importing it.
+        import concurrent.futures
+        # Sending items to worker processes one at a time would add a
+        # lot of overhead when there are thousands of items.
+        CHUNK_SIZE: Final = max(1, len(items) // (WORKER_COUNT * 4))
+        with concurrent.futures.ProcessPoolExecutor(
+            max_workers=WORKER_COUNT,
+            initializer=init
+        ) as executor:
+            yield from executor.map(
+                function,
+                items,
+                chunksize=CHUNK_SIZE
+            )
+
+
+def read_repo_list(path: str) -> list[pathlib.Path]:
+    """
+    Read a list of repo paths, one per line.
+    """
+    with contextlib.ExitStack() as stack:
+        FILE: Final = (
+            sys.stdin
+            if path == '-'
+            else stack.enter_context(open(path, encoding='utf_8'))
+        )
+        return [
+            pathlib.Path(line.rstrip('\n'))
+            for line in FILE
+            if len(line.strip()) > 0
+        ]
+
+
+def cache_directory() -> pathlib.Path:
+    """
+    Return the directory where hooks should store their caches.
+
+    See the XDG Base Directory Specification for details:
+    <https://specifications.freedesktop.org/basedir-spec/latest/>.
+    """
+    XDG_CACHE_HOME: Final = os.environ.get('XDG_CACHE_HOME', '')
+    base: pathlib.Path
+    if os.path.isabs(XDG_CACHE_HOME):
+        base = pathlib.Path(XDG_CACHE_HOME)
+    else:
+        base = pathlib.Path.home() / '.cache'
+    return base / 'jasons-pre-commit-hooks'
+
+
+def read_cache(name: str) -> Optional[str]:
+    """
+    Return the contents of a cache file or None if it can’t be read.
+    """
+    try:
+        return (cache_directory() / name).read_text(encoding='utf_8')
+    except (OSError, UnicodeDecodeError):
+        return None
+
+
+def write_cache(name: str, contents: str) -> None:
+    """
+    Replace the contents of a cache file.
+
+    The file gets replaced atomically, so other processes that are
+    reading the cache at the same time will either see the old version
+    or the new version and never a partially written version. Caches
+    are only an optimization, so errors are turned into warnings.
+    """
+    import tempfile
+    DIRECTORY: Final = cache_directory()
+    temporary_path: Optional[str] = None
+    try:
+        DIRECTORY.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            'w',
+            encoding='utf_8',
+            dir=DIRECTORY,
+            prefix=f".{name}.",
+            delete=False
+        ) as file:
+            temporary_path = file.name
+            file.write(contents)
+        os.replace(temporary_path, DIRECTORY / name)
+    except OSError as exception:
+        warnings.warn(
+            f"Failed to write to the {name} cache: {exception}"
+        )
+        if temporary_path is not None:
+            with contextlib.suppress(OSError):
+                os.remove(temporary_path)
+
+
+# If a file was modified less than this many nanoseconds ago, then it
+# could be modified again without its mtime changing. Some file systems
+# only store mtimes with a resolution of one or two seconds.
+RACY_STAMP_THRESHOLD: Final = 3_000_000_000
+class FileStamp(NamedTuple):
+    """
+    Information about a file that changes whenever the file changes.
+    """
+    size: int
+    mtime_ns: int
+    inode: int
+
+    @classmethod
+    def of(cls, path: pathlib.Path) -> Optional[Self]:
+        """
+        Return a file’s stamp or None if it shouldn’t be trusted.
+        """
+        try:
+            STAT: Final = path.stat()
+        except OSError:
+            return None
+        if time.time_ns() - STAT.st_mtime_ns < RACY_STAMP_THRESHOLD:
+            return None
+        return cls(STAT.st_size, STAT.st_mtime_ns, STAT.st_ino)
@@ -1,40 +1,329 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: CC0-1.0
-# SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-disable
+# SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-enable
 import argparse
+import codecs
+import collections.abc
+import functools
+import hashlib
 import pathlib
+import re
 import sys
 import unicodedata
-from typing import Final, Iterable
+from typing import Final, Optional
 
 import wcwidth
 
-from . import init
+from . import (
+    default_job_count,
+    init,
+    map_in_parallel,
+    positive_int,
+    read_cache,
+    write_cache
+)
 
 
-def line_and_maybe_column_number(
-    line: str,
-    line_index: int,
-    character_index: int
-) -> str:
+# The number of bytes that get read from a file at a time.
+CHUNK_SIZE: Final = 1024 * 1024
+BAD_CATEGORIES: Final = frozenset(('Cs', 'Co', 'Cn'))
+# The cache contains the hashes of files that didn’t contain any bad
+# code points. It’s split into shards based on the first few hex digits
+# of each hash so that checking a few files only has to read and
+# rewrite a few small files. Each shard contains one hash per line, from
+# least recently used to most recently used.
+CACHE_NAME_PREFIX: Final = 'detect-bad-unicode-clean-files-'
+CACHE_SHARD_DIGITS: Final = 2
+# Each line in a shard is a SHA-256 hash in hex plus a newline, so this
+# limits each shard to 64 KiB and the whole cache to 16 MiB.
+MAX_SHARD_ENTRIES: Final = 64 * 1024 // 65
+# These are the same line boundaries that str.splitlines() uses. See
+# <https://docs.python.org/3/library/stdtypes.html#str.splitlines>.
+LINE_BOUNDARY_PATTERN: Final = re.compile(
+    '\r\n|[\n\r\v\f\x1c\x1d\x1e\x85\u2028\u2029]'
+)
+
+
+@functools.cache
+def bad_code_point_candidate_pattern() -> re.Pattern[str]:
+    """
+    Return a pattern that matches possibly bad code points.
+
+    The pattern matches every bad code point in the Basic Multilingual
+    Plane and every code point outside of the Basic Multilingual Plane.
+    Code points outside of the BMP still need to be checked using
+    unicodedata.category(). Python’s re module can look up BMP code
+    points in a table, but it has to check code points outside of the
+    BMP against each range in a character class one at a time. Listing
+    hundreds of unassigned ranges from the other planes would make
+    scanning ordinary text slower than calling unicodedata.category()
+    on every character.
+    """
+    ranges: list[str] = []
+    range_start: Optional[int] = None
+    code_point: int
+    for code_point in range(0x10000):
+        is_bad: bool = \
+            unicodedata.category(chr(code_point)) in BAD_CATEGORIES
+        if is_bad and range_start is None:
+            range_start = code_point
+        elif not is_bad and range_start is not None:
+            range_end: int = code_point - 1
+            ranges.append(f"\\u{range_start:04X}-\\u{range_end:04X}")
+            range_start = None
+    if range_start is not None:
+        ranges.append(f"\\u{range_start:04X}-\\uFFFF")
+    ranges.append(f"\\U00010000-\\U{sys.maxunicode:08X}")
+    return re.compile(f"[{''.join(ranges)}]")
+
+
+def bad_code_points(
+    text: str
+) -> collections.abc.Iterable[tuple[int, str]]:
+    """
+    Find every bad code point in text.
+
+    Yields the index of each bad code point along with its general
+    category.
+    """
+    if text.isascii():
+        return
+    match: re.Match[str]
+    for match in bad_code_point_candidate_pattern().finditer(text):
+        category: str = unicodedata.category(match.group())
+        if category in BAD_CATEGORIES:
+            yield match.start(), category
+
+
+def line_and_maybe_column_number(line_index: int, width: int) -> str:
+    """
+    Describe where a code point is.
+
+    width should be the display width of everything that comes before
+    the code point on its line, as returned by wcwidth.wcswidth(). If
+    width is negative, then the column number is left out.
+    """
     return_value: str = f"line {line_index + 1:n}"
-    # When calculating the width, we purposely don’t include the
-    # character that we’re trying to find the position of. For whatever
-    # reason, U+34544 has East_Asian_Width set to “Wide” even though
-    # U+34544 isn’t assigned to any character [1]. In situations like
-    # that, it makes sense for the column number to point to the start
-    # of the character. Purposefully not including the character that
-    # we’re looking for while doing the width calculation allows us to
-    # point to the beginning of the character in that situation.
-    #
-    # [1]: <https://util.unicode.org/UnicodeJsps/character.jsp?a=34544>
-    width: int = wcwidth.wcswidth(line[:character_index])
     if width >= 0:
         return_value += f" column {width + 1:n}"
 
     return return_value
 
 
+# wcwidth.wcswidth() measures some sequences of characters, like emoji
+# sequences, as a whole. When LineWidth measures a piece of a line, it
+# includes up to this many of the characters that came before it so
+# that sequences that were cut in half still get measured correctly.
+LINE_WIDTH_CONTEXT_LENGTH: Final = 8
+
+
+class LineWidth:
+    """
+    The display width of a line that gets measured a piece at a time.
+
+    Calling wcwidth.wcswidth() on everything that comes before each bad
+    code point would measure the start of a line over and over again.
+    Instead, each piece of the line gets measured once using
+    wcwidth.wcswidth(), and the widths get added up. Each piece gets
+    measured along with the last few characters of the line that were
+    already measured, and then their width gets subtracted. That way,
+    the result is the same as measuring the whole line at once unless
+    wcwidth.wcswidth() has to look further back than that.
+    """
+    def __init__(self) -> None:
+        # This is negative if the width can’t be determined, just like
+        # the return value of wcwidth.wcswidth().
+        self.measured_width: int = 0
+        # The end of the part of the line that’s already been measured
+        # and its width.
+        self.context: str = ""
+        self.context_width: int = 0
+        self.unmeasured: list[str] = []
+        self.unmeasured_length: int = 0
+
+    def add(self, text: str) -> None:
+        self.unmeasured.append(text)
+        self.unmeasured_length += len(text)
+        # A long line that doesn’t contain any bad code points shouldn’t
+        # have to fit in memory all at once.
+        if self.unmeasured_length >= CHUNK_SIZE:
+            self.measure()
+
+    def measure(self) -> None:
+        if self.measured_width >= 0 and self.unmeasured_length > 0:
+            TEXT: Final = self.context + "".join(self.unmeasured)
+            WIDTH: Final = wcwidth.wcswidth(TEXT)
+            if WIDTH < 0:
+                self.measured_width = WIDTH
+            else:
+                self.measured_width += WIDTH - self.context_width
+            self.context = TEXT[-LINE_WIDTH_CONTEXT_LENGTH:]
+            self.context_width = wcwidth.wcswidth(self.context)
+            # The context might start with a character that
+            # wcwidth.wcswidth() only ignored because of the character
+            # that came before it, like a control character that comes
+            # after a zero width joiner.
+            while self.context_width < 0:
+                self.context = self.context[1:]
+                self.context_width = wcwidth.wcswidth(self.context)
+        self.unmeasured.clear()
+        self.unmeasured_length = 0
+
+    @property
+    def width(self) -> int:
+        self.measure()
+        return self.measured_width
+
+
+def decoded_chunks(
+    path: pathlib.Path
+) -> collections.abc.Iterable[str]:
+    """
+    Read a UTF-8 file a piece at a time.
+
+    None of the chunks end with a \r that’s immediately followed by a
+    \n, so a \r\n line boundary never gets split between two chunks.
+    """
+    DECODER: Final = codecs.getincrementaldecoder('utf_8')(
+        errors='surrogatepass'
+    )
+    held_back: str = ""
+    with path.open('rb') as file:
+        while True:
+            data: bytes = file.read(CHUNK_SIZE)
+            is_final: bool = len(data) == 0
+            chunk: str = held_back + DECODER.decode(data, is_final)
+            held_back = ""
+            if not is_final and chunk.endswith('\r'):
+                held_back = chunk[-1]
+                chunk = chunk[:-1]
+            if len(chunk) > 0:
+                yield chunk
+            if is_final:
+                return
+
+
+def check_file(path: pathlib.Path) -> list[str]:
+    """
+    Return an error message for each bad code point in a file.
+
+    The file is read in chunks, so the amount of memory that this uses
+    doesn’t depend on how big the file is.
+    """
+    error_messages: list[str] = []
+    line_index: int = 0
+    line_width: LineWidth = LineWidth()
+    chunk: str
+    for chunk in decoded_chunks(path):
+        # Everything in this chunk that comes before this index has
+        # already been added to line_width.
+        measured_up_to: int = 0
+        line_boundaries: collections.abc.Iterator[re.Match[str]] = \
+            LINE_BOUNDARY_PATTERN.finditer(chunk)
+        next_line_boundary: Optional[re.Match[str]] = \
+            next(line_boundaries, None)
+        character_index: int
+        category: str
+        for character_index, category in bad_code_points(chunk):
+            while (
+                next_line_boundary is not None
+                and next_line_boundary.end() <= character_index
+            ):
+                line_index += 1
+                measured_up_to = next_line_boundary.end()
+                line_width = LineWidth()
+                next_line_boundary = next(line_boundaries, None)
+            # When calculating the width, we purposely don’t include
+            # the character that we’re trying to find the position of.
+            # For whatever reason, U+34544 has East_Asian_Width set to
+            # “Wide” even though U+34544 isn’t assigned to any
+            # character [1]. In situations like that, it makes sense
+            # for the column number to point to the start of the
+            # character. Purposefully not including the character that
+            # we’re looking for while doing the width calculation
+            # allows us to point to the beginning of the character in
+            # that situation.
+            #
+            # editorconfig-checker-disable
+            # [1]: <https://util.unicode.org/UnicodeJsps/character.jsp?a=34544>
+            # editorconfig-checker-enable
+            line_width.add(chunk[measured_up_to:character_index])
+            measured_up_to = character_index
+            position: str = line_and_maybe_column_number(
+                line_index,
+                line_width.width
+            )
+            error_messages.append(
+                f"ERROR: {path}: {position}: "
+                f"U+{ord(chunk[character_index]):04X} is in a bad "
+                f"Unicode general category: {category}"
+            )
+        while next_line_boundary is not None:
+            line_index += 1
+            measured_up_to = next_line_boundary.end()
+            line_width = LineWidth()
+            next_line_boundary = next(line_boundaries, None)
+        line_width.add(chunk[measured_up_to:])
+    return error_messages
+
+
+def file_digest(path: pathlib.Path) -> str:
+    """
+    Hash a file’s contents for the clean file cache.
+
+    Whether or not a file contains bad code points depends on which
+    version of the Unicode Character Database is being used, so that
+    version gets hashed too.
+    """
+    UNIDATA_VERSION: Final = unicodedata.unidata_version.encode('ascii')
+    with path.open('rb') as file:
+        return hashlib.file_digest(
+            file,
+            functools.partial(hashlib.sha256, UNIDATA_VERSION + b'\0')
+        ).hexdigest()
+
+
+def cache_shard_name(digest: str) -> str:
+    return f"{CACHE_NAME_PREFIX}{digest[:CACHE_SHARD_DIGITS]}"
+
+
+def update_clean_file_cache(
+    old_shards: collections.abc.Mapping[str, list[str]],
+    used_entries: collections.abc.Iterable[str]
+) -> None:
+    """
+    Save the cache and evict the least recently used entries.
+
+    Only the shards that the used entries belong to get looked at, and
+    they only get rewritten if their contents changed.
+    """
+    USED_ENTRIES_BY_SHARD: Final[dict[str, dict[str, None]]] = {}
+    entry: str
+    for entry in used_entries:
+        USED_ENTRIES_BY_SHARD.setdefault(
+            cache_shard_name(entry),
+            {}
+        )[entry] = None
+    shard_name: str
+    used_shard_entries: dict[str, None]
+    for shard_name, used_shard_entries in USED_ENTRIES_BY_SHARD.items():
+        old_shard_entries: list[str] = old_shards.get(shard_name, [])
+        shard_entries: list[str] = [
+            entry
+            for entry in old_shard_entries
+            if entry not in used_shard_entries
+        ]
+        shard_entries.extend(used_shard_entries)
+        shard_entries = shard_entries[-MAX_SHARD_ENTRIES:]
+        if shard_entries != old_shard_entries:
+            write_cache(
+                shard_name,
+                "".join(f"{entry}\n" for entry in shard_entries)
+            )
+
+
 def main() -> int:
     init()
     PARSER: Final = argparse.ArgumentParser(
@@ -55,35 +344,77 @@ def main() -> int:
         type=pathlib.Path,
         metavar="FILE"
     )
+    PARSER.add_argument(
+        '-j',
+        '--jobs',
+        default=default_job_count(),
+        type=positive_int,
+        help=(
+            "The maximum number of files to check at the same time. "
+            "Defaults to the number of CPUs."
+        ),
+        metavar="N"
+    )
+    PARSER.add_argument(
+        '--no-cache',
+        action='store_false',
+        help=(
+            "Don’t skip files that were free of bad code points the "
+            "last time that they were checked, and don’t record which "
+            "files are free of bad code points."
+        ),
+        dest='use_cache'
+    )
     ARGS: Final = PARSER.parse_args()
 
-    any_errors: bool = False
-    path: pathlib.Path
-    for path in ARGS.paths:
-        text: str = path.read_text(
-            encoding='utf_8',
-            errors='surrogatepass'
+    paths_to_check: list[pathlib.Path] = ARGS.paths
+    # These are None if the cache isn’t being used.
+    digests_to_check: list[Optional[str]] = [None] * len(ARGS.paths)
+    cache_shards: dict[str, list[str]] = {}
+    used_cache_entries: list[str] = []
+    if ARGS.use_cache:
+        DIGESTS: Final = tuple(
+            map_in_parallel(file_digest, ARGS.paths, ARGS.jobs)
+        )
+        shard_name: str
+        for shard_name in map(cache_shard_name, DIGESTS):
+            if shard_name not in cache_shards:
+                cache_shards[shard_name] = (
+                    read_cache(shard_name) or ""
+                ).splitlines()
+        CLEAN_DIGESTS: Final = frozenset(
+            entry
+            for shard_entries in cache_shards.values()
+            for entry in shard_entries
         )
+        paths_to_check = []
+        digests_to_check = []
+        path: pathlib.Path
+        digest: str
+        for path, digest in zip(ARGS.paths, DIGESTS):
+            if digest in CLEAN_DIGESTS:
+                used_cache_entries.append(digest)
+            else:
+                paths_to_check.append(path)
+                digests_to_check.append(digest)
 
-        line_index: int
-        line: str
-        lines: Iterable[str] = text.splitlines(keepends=True)
-        for line_index, line in enumerate(lines):
-            character_index: int
-            character: str
-            for character_index, character in enumerate(line):
-                category: str = unicodedata.category(character)
-                if category in ('Cs', 'Co', 'Cn'):
-                    any_errors = True
-                    position: str = line_and_maybe_column_number(
-                        line,
-                        line_index,
-                        character_index
-                    )
-                    print(
-                        f"ERROR: {path}: {position}:",
-                        f"U+{ord(character):04X} is in a bad",
-                        f"Unicode general category: {category}",
-                        file=sys.stderr
-                    )
+    any_errors: bool = False
+    new_cache_entries: list[str] = []
+    digest_to_check: Optional[str]
+    error_messages: list[str]
+    for digest_to_check, error_messages in zip(
+        digests_to_check,
+        map_in_parallel(check_file, paths_to_check, ARGS.jobs)
+    ):
+        error_message: str
+        for error_message in error_messages:
+            any_errors = True
+            print(error_message, file=sys.stderr)
+        if digest_to_check is not None and len(error_messages) == 0:
+            new_cache_entries.append(digest_to_check)
+
+    update_clean_file_cache(
+        cache_shards,
+        used_cache_entries + new_cache_entries
+    )
     return any_errors
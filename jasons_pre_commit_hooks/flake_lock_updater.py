@@ -1,16 +1,32 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: CC0-1.0
-# SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-disable
+# SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-enable
 import argparse
 import collections.abc
 import datetime
+import hashlib
 import json
+import os
 import pathlib
+import shlex
 import subprocess
 import sys
-from typing import Final
+import time
+from typing import Any, Final, Optional
 
-from . import init, paths_in_repo
+from . import (
+    FileStamp,
+    default_job_count,
+    init,
+    map_in_parallel,
+    open_cwd_as_repo,
+    paths_in_repo,
+    positive_int,
+    read_cache,
+    write_cache
+)
 
 
 exit_status: int
@@ -18,23 +34,44 @@ exit_status: int
 EX_DATAERR: Final = 65
 
 
-yield_type = collections.abc.Iterable[datetime.datetime]
+# json.load() normally turns every JSON object into a dict. When a lock
+# file is being read, JSON objects that don’t contain any "lastModified"
+# values get turned into this instead, and the other JSON objects only
+# keep the parts that lead to "lastModified" values. That way, a lock
+# file never has to be in memory as a whole tree of dicts.
+JSON_OBJECT: Final = object()
+
+
+# The keys that lead to the JSON object that contains a "lastModified"
+# value. For example, ("nodes", "nixpkgs", "locked").
+json_location = tuple[str, ...]
 def all_last_modified_values(
-    lock_file_path: pathlib.Path,
-    json_value: dict[object, object]
-) -> yield_type:
-    global exit_status
-    for key, value in json_value.items():
-        if isinstance(value, dict):
-            generator: yield_type = all_last_modified_values(
-                    lock_file_path,
-                    value
-            )
-            for last_modified_value in generator:
-                yield last_modified_value
-        elif key == "lastModified":
-            if isinstance(value, int):
-                yield datetime.datetime.fromtimestamp(
+    lock_file_path: pathlib.Path
+) -> Optional[dict[json_location, datetime.datetime]]:
+    """
+    Find every "lastModified" value in a lock file.
+
+    The values are collected while the lock file is being parsed.
+    Returns None if the lock file isn’t valid. This gets run in worker
+    processes, so it reports problems by printing them and returning
+    None instead of by setting exit_status.
+    """
+    all_values_valid: bool = True
+
+    def collect_last_modified_value(
+        pairs: list[tuple[str, object]]
+    ) -> object:
+        nonlocal all_values_valid
+        kept: dict[str, object] = {}
+        key: str
+        value: object
+        for key, value in pairs:
+            if isinstance(value, dict):
+                kept[key] = value
+            elif key != "lastModified" or value is JSON_OBJECT:
+                continue
+            elif isinstance(value, int):
+                kept[key] = datetime.datetime.fromtimestamp(
                     value,
                     tz=datetime.timezone.utc
                 )
@@ -44,20 +81,122 @@ def all_last_modified_values(
                     f' "lastModified" value: {repr(value)}'
                 )
                 print(error_message, file=sys.stderr)
-                exit_status = EX_DATAERR
+                all_values_valid = False
+        return kept if len(kept) > 0 else JSON_OBJECT
+
+    # Lock files are guaranteed to be UTF-8 JSON files [1].
+    #
+    # editorconfig-checker-disable
+    # [1]: <https://hydra.nixos.org/build/273946807/download/1/manual/command-ref/new-cli/nix3-flake.html#lock-files>
+    # editorconfig-checker-enable
+    with lock_file_path.open(encoding="utf-8") as lock_file:
+        lock_file_data: object = json.load(
+            lock_file,
+            object_pairs_hook=collect_last_modified_value
+        )
+
+    if lock_file_data is JSON_OBJECT:
+        return {} if all_values_valid else None
+    elif not isinstance(lock_file_data, dict):
+        error_message: str = (
+            f"ERROR: “{lock_file_path}” does not appear to be a "
+            "valid flake.lock file."
+        )
+        print(error_message, file=sys.stderr)
+        return None
+    elif not all_values_valid:
+        return None
+
+    last_modified_values: dict[json_location, datetime.datetime] = {}
+    to_visit: list[tuple[json_location, dict[str, object]]] = [
+        ((), lock_file_data)
+    ]
+    while len(to_visit) > 0:
+        location: json_location
+        json_object: dict[str, object]
+        location, json_object = to_visit.pop()
+        for key, value in json_object.items():
+            if isinstance(value, dict):
+                to_visit.append((location + (key,), value))
+            elif isinstance(value, datetime.datetime):
+                last_modified_values[location] = value
+    return last_modified_values
+
+
+def input_name(location: json_location) -> str:
+    """
+    Describe where a "lastModified" value came from.
+
+    Normally, "lastModified" values are found in the nodes map, so this
+    returns the name of the node.
+    """
+    if len(location) >= 2 and location[0] == "nodes":
+        return location[1]
+    else:
+        return "/".join(location)
+
+
+def last_modified_by_input(
+    last_modified_values: dict[json_location, datetime.datetime]
+) -> dict[str, datetime.datetime]:
+    RESULT: Final[dict[str, datetime.datetime]] = {}
+    location: json_location
+    value: datetime.datetime
+    name: str
+    for location, value in last_modified_values.items():
+        name = input_name(location)
+        if name not in RESULT or RESULT[name] < value:
+            RESULT[name] = value
+    return RESULT
+
+
+def is_too_old(age: datetime.timedelta) -> bool:
+    return age.days > 7
+
+
+def needs_update(
+    last_modified_values: dict[str, datetime.datetime],
+    now: datetime.datetime
+) -> bool:
+    """
+    Check if a lock file hasn’t been updated in over a week.
+
+    Some inputs rarely change, so they can be over a week old even right
+    after they’ve been updated. That’s why only the newest
+    "lastModified" value gets looked at.
+    """
+    NEWEST: Final = max(last_modified_values.values(), default=None)
+    return NEWEST is not None and is_too_old(now - NEWEST)
+
 
+UPDATE_COMMAND: Final[tuple[str, ...]] = (
+    "nix",
+    "--extra-experimental-features",
+    "nix-command flakes",
+    "flake",
+    "update"
+)
 
-def try_to_update_lock_file(lock_file_path: pathlib.Path) -> None:
+
+def try_to_update_lock_file(lock_file_path: pathlib.Path) -> bool:
+    """
+    Run “nix flake update” and report whether or not it succeeded.
+    """
     print(f"Attempting to update “{lock_file_path}”…")
-    COMMAND: Final[tuple[str, ...]] = (
-        "nix",
-        "--extra-experimental-features",
-        "nix-command flakes",
-        "flake",
-        "update"
-    )
-    subprocess.run(COMMAND, check=True, cwd=lock_file_path.parent)
+    try:
+        subprocess.run(
+            UPDATE_COMMAND,
+            check=True,
+            cwd=lock_file_path.parent
+        )
+    except subprocess.CalledProcessError as exception:
+        print(
+            f"ERROR: Failed to update “{lock_file_path}”: {exception}",
+            file=sys.stderr
+        )
+        return False
     print(f"Successfully updated “{lock_file_path}”.")
+    return True
 
 
 def all_flake_lock_files() -> collections.abc.Iterable[pathlib.Path]:
@@ -67,6 +206,285 @@ def all_flake_lock_files() -> collections.abc.Iterable[pathlib.Path]:
             yield path
 
 
+def stamp_cache_name() -> str:
+    """
+    Return the name of the cache for the current working directory.
+    """
+    CWD: Final = os.fsencode(pathlib.Path.cwd())
+    return f"flake-lock-updater-{hashlib.sha256(CWD).hexdigest()}.json"
+
+
+def timestamps_to_json(
+    values: dict[str, datetime.datetime]
+) -> dict[str, int]:
+    return {
+        name: int(value.timestamp()) for name, value in values.items()
+    }
+
+
+def timestamps_from_json(
+    data: object
+) -> Optional[dict[str, datetime.datetime]]:
+    if not isinstance(data, dict):
+        return None
+    RESULT: Final[dict[str, datetime.datetime]] = {}
+    for name, value in data.items():
+        if not isinstance(value, int):
+            return None
+        RESULT[name] = datetime.datetime.fromtimestamp(
+            value,
+            tz=datetime.timezone.utc
+        )
+    return RESULT
+
+
+class StampCache:
+    """
+    Remembers what was learned about lock files during previous runs.
+
+    For each lock file, this stores the lock file’s stamp and the
+    newest "lastModified" value for each of the lock file’s nodes. If
+    the lock file’s stamp hasn’t changed, then the lock file doesn’t
+    need to be parsed again. This also stores the Git index’s stamp and
+    the list of lock files that were in the index, so that the index
+    doesn’t need to be read again if it hasn’t changed.
+    """
+    def __init__(self, enabled: bool) -> None:
+        self.enabled: Final = enabled
+        self.old: dict[str, Any] = {}
+        if enabled:
+            try:
+                DATA: Final = json.loads(
+                    read_cache(stamp_cache_name()) or "{}"
+                )
+                if isinstance(DATA, dict):
+                    self.old = DATA
+            except ValueError:
+                pass
+        self.new: dict[str, Any] = {'lock_files': {}}
+        # This is False if only some of the lock files were looked at.
+        self.listed_all_lock_files: bool = False
+
+    def old_section(self, name: str) -> dict[str, Any]:
+        SECTION: Final = self.old.get(name)
+        return SECTION if isinstance(SECTION, dict) else {}
+
+    def flake_lock_files(self) -> tuple[pathlib.Path, ...]:
+        self.listed_all_lock_files = True
+        if not self.enabled:
+            return tuple(all_flake_lock_files())
+        with open_cwd_as_repo() as repo:
+            INDEX_PATH: Final = pathlib.Path(repo.index_path())
+        INDEX_STAMP: Final = FileStamp.of(INDEX_PATH)
+        OLD_INDEX: Final = self.old_section('index')
+        if (
+            INDEX_STAMP is not None
+            and OLD_INDEX.get('stamp') == list(INDEX_STAMP)
+            and isinstance(OLD_INDEX.get('lock_files'), list)
+        ):
+            self.new['index'] = OLD_INDEX
+            return tuple(
+                pathlib.Path(path) for path in OLD_INDEX['lock_files']
+            )
+        LOCK_FILES: Final = tuple(all_flake_lock_files())
+        if INDEX_STAMP is not None:
+            self.new['index'] = {
+                'stamp': list(INDEX_STAMP),
+                'lock_files': [str(path) for path in LOCK_FILES]
+            }
+        return LOCK_FILES
+
+    def last_modified_values(
+        self,
+        lock_file_path: pathlib.Path
+    ) -> Optional[dict[str, datetime.datetime]]:
+        """
+        Look up a lock file’s "lastModified" values.
+
+        Returns None if the lock file wasn’t in the cache or if it
+        changed since it was cached.
+        """
+        if not self.enabled:
+            return None
+        STAMP: Final = FileStamp.of(lock_file_path)
+        ENTRY: Final = \
+            self.old_section('lock_files').get(str(lock_file_path))
+        if (
+            STAMP is None
+            or not isinstance(ENTRY, dict)
+            or ENTRY.get('stamp') != list(STAMP)
+        ):
+            return None
+        VALUES: Final = timestamps_from_json(ENTRY.get('inputs'))
+        if VALUES is not None:
+            self.new['lock_files'][str(lock_file_path)] = ENTRY
+        return VALUES
+
+    def record(
+        self,
+        lock_file_path: pathlib.Path,
+        stamp: Optional[FileStamp],
+        values: dict[str, datetime.datetime]
+    ) -> None:
+        if stamp is not None:
+            self.new['lock_files'][str(lock_file_path)] = {
+                'stamp': list(stamp),
+                'inputs': timestamps_to_json(values)
+            }
+
+    def save(self) -> None:
+        if not self.enabled:
+            return
+        if not self.listed_all_lock_files:
+            # The index and the lock files that weren’t looked at
+            # during this run might still be the same as they were
+            # when they were cached, so their entries get kept.
+            OLD_INDEX: Final = self.old_section('index')
+            if len(OLD_INDEX) > 0:
+                self.new.setdefault('index', OLD_INDEX)
+            path: str
+            entry: Any
+            for path, entry in self.old_section('lock_files').items():
+                self.new['lock_files'].setdefault(path, entry)
+        if self.new != self.old:
+            write_cache(stamp_cache_name(), json.dumps(self.new))
+
+
+def read_lock_file(
+    lock_file_path: pathlib.Path
+) -> tuple[Optional[FileStamp], Optional[dict[str, datetime.datetime]]]:
+    """
+    Parse a lock file and find each node’s "lastModified" value.
+
+    Returns the lock file’s stamp from before it was parsed and the
+    values, or None instead of the values if the lock file isn’t valid.
+    """
+    STAMP: Final = FileStamp.of(lock_file_path)
+    LAST_MODIFIED_VALUES: Final = \
+        all_last_modified_values(lock_file_path)
+    if LAST_MODIFIED_VALUES is None:
+        return STAMP, None
+    return STAMP, last_modified_by_input(LAST_MODIFIED_VALUES)
+
+
+def plan_for_lock_file(
+    lock_file_path: pathlib.Path,
+    last_modified_values: Optional[
+        dict[json_location, datetime.datetime]
+    ],
+    now: datetime.datetime
+) -> dict[str, Any]:
+    """
+    Describe what would happen to a lock file without updating it.
+    """
+    PLAN: Final[dict[str, Any]] = {
+        "path": str(lock_file_path),
+        "valid": last_modified_values is not None,
+        "newest_last_modified": None,
+        "newest_input_age_seconds": None,
+        "stale_inputs": [],
+        "update": None
+    }
+    if last_modified_values is None:
+        return PLAN
+    NEWEST: Final = max(last_modified_values.values(), default=None)
+    if NEWEST is not None:
+        PLAN["newest_last_modified"] = NEWEST.isoformat()
+        PLAN["newest_input_age_seconds"] = \
+            (now - NEWEST).total_seconds()
+    BY_INPUT: Final = last_modified_by_input(last_modified_values)
+    PLAN["stale_inputs"] = sorted(
+        name
+        for name, last_modified_value in BY_INPUT.items()
+        if is_too_old(now - last_modified_value)
+    )
+    if needs_update(BY_INPUT, now):
+        PLAN["update"] = {
+            "command": list(UPDATE_COMMAND),
+            "cwd": str(lock_file_path.parent)
+        }
+    return PLAN
+
+
+def print_plan(
+    paths: collections.abc.Sequence[pathlib.Path],
+    jobs: int,
+    output_format: str
+) -> None:
+    """
+    Print what would be updated along with how long each phase took.
+    """
+    global exit_status
+    TIMINGS: Final[dict[str, float]] = {}
+    phase_start: float = time.perf_counter()
+    LOCK_FILE_PATHS: Final[tuple[pathlib.Path, ...]] = (
+        tuple(paths)
+        if len(paths) > 0
+        else tuple(all_flake_lock_files())
+    )
+    TIMINGS["index scan"] = time.perf_counter() - phase_start
+
+    phase_start = time.perf_counter()
+    ALL_LAST_MODIFIED_VALUES: Final = tuple(
+        map_in_parallel(all_last_modified_values, LOCK_FILE_PATHS, jobs)
+    )
+    TIMINGS["parse"] = time.perf_counter() - phase_start
+    if any(values is None for values in ALL_LAST_MODIFIED_VALUES):
+        exit_status = EX_DATAERR
+
+    phase_start = time.perf_counter()
+    NOW: Final = datetime.datetime.now(datetime.timezone.utc)
+    PLANS: Final = [
+        plan_for_lock_file(
+            lock_file_path,
+            last_modified_values,
+            NOW
+        )
+        for lock_file_path, last_modified_values
+        in zip(LOCK_FILE_PATHS, ALL_LAST_MODIFIED_VALUES)
+    ]
+    TIMINGS["age computation"] = time.perf_counter() - phase_start
+
+    if output_format == "json":
+        json.dump(
+            {"lock_files": PLANS, "timings": TIMINGS},
+            sys.stdout,
+            indent=4
+        )
+        print()
+        return
+    plan: dict[str, Any]
+    age: datetime.timedelta
+    for plan in PLANS:
+        if not plan["valid"]:
+            continue
+        print(f"“{plan['path']}”:")
+        if plan["newest_input_age_seconds"] is None:
+            print("\tThere are no inputs.")
+        else:
+            age = datetime.timedelta(
+                seconds=plan["newest_input_age_seconds"]
+            )
+            print(f"\tThe newest input is {age.days} days old.")
+        if len(plan["stale_inputs"]) > 0:
+            print(
+                "\tThese inputs are over a week old:",
+                ", ".join(plan["stale_inputs"])
+            )
+        if plan["update"] is None:
+            print("\tIt doesn’t need to be updated.")
+        else:
+            print(
+                "\tThis command would be run in",
+                f"“{plan['update']['cwd']}”:",
+                shlex.join(plan["update"]["command"])
+            )
+    phase: str
+    duration: float
+    for phase, duration in TIMINGS.items():
+        print(f"Time spent on {phase}: {duration:.3f} seconds")
+
+
 def main() -> int:
     init()
     global exit_status
@@ -74,7 +492,7 @@ def main() -> int:
 
     PARSER: Final = argparse.ArgumentParser(
         description=(
-            "Updates a flake.lock file if it hasn’t been updated in "
+            "Updates flake.lock files that haven’t been updated in "
             "over a week."
         )
     )
@@ -91,39 +509,102 @@ def main() -> int:
         ),
         metavar="PATH"
     )
+    PARSER.add_argument(
+        "-j",
+        "--jobs",
+        default=default_job_count(),
+        type=positive_int,
+        help=(
+            "The maximum number of lock files to read or update at the "
+            "same time. Defaults to the number of CPUs."
+        ),
+        metavar="N"
+    )
+    PARSER.add_argument(
+        "--no-cache",
+        action="store_false",
+        help=(
+            "Parse every lock file, even if it hasn’t changed since "
+            "the last time that flake-lock-updater was run."
+        ),
+        dest="use_cache"
+    )
+    PARSER.add_argument(
+        "--plan",
+        action="store_true",
+        help=(
+            "Don’t update anything. Instead, report how old each lock "
+            "file’s inputs are, which inputs are over a week old and "
+            "which commands would be run. Every lock file gets parsed, "
+            "even if it hasn’t changed since the last run."
+        )
+    )
+    PARSER.add_argument(
+        "--format",
+        choices=("text", "json"),
+        default="text",
+        help="The output format for --plan."
+    )
     ARGS: Final = PARSER.parse_args()
 
-    LOCK_FILE_PATHS: Final[collections.abc.Iterable[pathlib.Path]] = (
-        ARGS.paths if len(ARGS.paths) > 0 else all_flake_lock_files()
+    if ARGS.plan:
+        print_plan(ARGS.paths, ARGS.jobs, ARGS.format)
+        return exit_status
+
+    CACHE: Final = StampCache(ARGS.use_cache)
+    LOCK_FILE_PATHS: Final[tuple[pathlib.Path, ...]] = (
+        tuple(ARGS.paths)
+        if len(ARGS.paths) > 0
+        else CACHE.flake_lock_files()
     )
+    # Invalid lock files don’t get added to this.
+    LAST_MODIFIED_VALUES: Final[
+        dict[pathlib.Path, dict[str, datetime.datetime]]
+    ] = {}
+    LOCK_FILES_TO_PARSE: Final[list[pathlib.Path]] = []
+    lock_file_path: pathlib.Path
+    values: Optional[dict[str, datetime.datetime]]
     for lock_file_path in LOCK_FILE_PATHS:
-        # Lock files are guaranteed to be UTF-8 JSON files [1].
-        #
-        # editorconfig-checker-disable
-        # [1]: <https://hydra.nixos.org/build/273946807/download/1/manual/command-ref/new-cli/nix3-flake.html#lock-files>
-        # editorconfig-checker-enable
-        with lock_file_path.open(encoding="utf-8") as lock_file:
-            lock_file_data: object = json.load(lock_file)
-
-        if isinstance(lock_file_data, dict):
-            latest_last_modified_value: datetime.datetime = max(
-                all_last_modified_values(lock_file_path, lock_file_data)
-            )
-            smallest_input_age = (
-                datetime.datetime.now(datetime.timezone.utc)
-                - latest_last_modified_value
-            )
-            if smallest_input_age.days > 7:
-                try_to_update_lock_file(lock_file_path)
-                break
-            else:
-                print(f"“{lock_file_path}” doesn’t need to be updated.")
+        values = CACHE.last_modified_values(lock_file_path)
+        if values is not None:
+            LAST_MODIFIED_VALUES[lock_file_path] = values
         else:
-            error_message: str = (
-                f"ERROR: “{lock_file_path}” does not appear to be a "
-                "valid flake.lock file."
-            )
-            print(error_message, file=sys.stderr)
+            LOCK_FILES_TO_PARSE.append(lock_file_path)
+    # Parsing a lock file keeps the interpreter busy the whole time, so
+    # lock files get parsed in worker processes instead of threads.
+    stamp: Optional[FileStamp]
+    for lock_file_path, (stamp, values) in zip(
+        LOCK_FILES_TO_PARSE,
+        map_in_parallel(read_lock_file, LOCK_FILES_TO_PARSE, ARGS.jobs)
+    ):
+        if values is None:
             exit_status = EX_DATAERR
+        else:
+            CACHE.record(lock_file_path, stamp, values)
+            LAST_MODIFIED_VALUES[lock_file_path] = values
+
+    NOW: Final = datetime.datetime.now(datetime.timezone.utc)
+    LOCK_FILES_TO_UPDATE: Final[list[pathlib.Path]] = []
+    for lock_file_path in LOCK_FILE_PATHS:
+        if lock_file_path not in LAST_MODIFIED_VALUES:
+            continue
+        if needs_update(LAST_MODIFIED_VALUES[lock_file_path], NOW):
+            LOCK_FILES_TO_UPDATE.append(lock_file_path)
+        else:
+            print(f"“{lock_file_path}” doesn’t need to be updated.")
+
+    # Updating a lock file mostly means waiting for Nix, so threads are
+    # good enough for that. This is imported here so that commands like
+    # “flake-lock-updater --help” don’t have to spend time importing it.
+    import concurrent.futures
+    with concurrent.futures.ThreadPoolExecutor(ARGS.jobs) as executor:
+        update_succeeded: bool
+        for update_succeeded in executor.map(
+            try_to_update_lock_file,
+            LOCK_FILES_TO_UPDATE
+        ):
+            if not update_succeeded and exit_status == 0:
+                exit_status = 1
+    CACHE.save()
 
     return exit_status
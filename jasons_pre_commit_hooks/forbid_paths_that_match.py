@@ -1,12 +1,135 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: CC0-1.0
-# SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-disable
+# SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-enable
 import argparse
+import collections.abc
+import contextlib
+import itertools
+import os
 import re
 import sys
-from typing import Final
+from typing import BinaryIO, Final, Optional
 
-from . import init
+from . import init, paths_in_repo
+
+
+# Patterns that contain something like this depend on their group
+# numbers, and their group numbers would change if they were combined
+# with other patterns.
+GROUP_NUMBER_REFERENCE_PATTERN: Final = re.compile(r'\\[1-9]|\(\?\(')
+
+
+def can_be_combined(pattern: re.Pattern[str]) -> bool:
+    if GROUP_NUMBER_REFERENCE_PATTERN.search(pattern.pattern):
+        return False
+    # Global inline flags like (?i) are only allowed at the start of an
+    # expression, so they stop working once they’re put inside a group.
+    try:
+        re.compile(f"(?:{pattern.pattern})")
+    except re.error:
+        return False
+    return True
+
+
+class PathMatcher:
+    """
+    Finds the patterns that a path matches.
+
+    Most paths don’t match any of the patterns, so as many patterns as
+    possible are combined into a single alternation. That way, most
+    paths only need to be scanned once no matter how many patterns
+    there are. The patterns are only tried one at a time for paths
+    that match the alternation.
+    """
+    def __init__(
+        self,
+        patterns: collections.abc.Sequence[re.Pattern[str]]
+    ) -> None:
+        self.patterns: Final = patterns
+        self.combined: Optional[re.Pattern[str]] = None
+        self.uncombined: list[re.Pattern[str]] = []
+        COMBINABLE: Final[list[re.Pattern[str]]] = []
+        pattern: re.Pattern[str]
+        for pattern in patterns:
+            if can_be_combined(pattern):
+                COMBINABLE.append(pattern)
+            else:
+                self.uncombined.append(pattern)
+        if len(COMBINABLE) > 0:
+            try:
+                self.combined = re.compile(
+                    "|".join(
+                        f"(?:{pattern.pattern})"
+                        for pattern in COMBINABLE
+                    )
+                )
+            except re.error:
+                # This can happen if two patterns use the same group
+                # name.
+                self.uncombined = list(patterns)
+
+    def might_match(self, path: str) -> bool:
+        return (
+            (
+                self.combined is not None
+                and self.combined.match(path) is not None
+            )
+            or any(
+                pattern.match(path) is not None
+                for pattern in self.uncombined
+            )
+        )
+
+    def matching_patterns(
+        self,
+        path: str
+    ) -> collections.abc.Iterable[re.Pattern[str]]:
+        if self.might_match(path):
+            pattern: re.Pattern[str]
+            for pattern in self.patterns:
+                if pattern.match(path) is not None:
+                    yield pattern
+
+
+# The number of bytes that get read from a list of paths at a time.
+CHUNK_SIZE: Final = 64 * 1024
+
+
+def read_delimited_paths(
+    file: BinaryIO,
+    delimiter: bytes
+) -> collections.abc.Iterable[str]:
+    """
+    Lazily read a list of paths from a file.
+
+    Only a small part of the file is kept in memory at a time, so the
+    list can be arbitrarily long. Empty entries are skipped.
+    """
+    unfinished_path: bytes = b""
+    while True:
+        chunk: bytes = file.read(CHUNK_SIZE)
+        if len(chunk) == 0:
+            break
+        byte_paths: list[bytes] = \
+            (unfinished_path + chunk).split(delimiter)
+        unfinished_path = byte_paths.pop()
+        byte_path: bytes
+        for byte_path in byte_paths:
+            if len(byte_path) > 0:
+                yield os.fsdecode(byte_path)
+    if len(unfinished_path) > 0:
+        yield os.fsdecode(unfinished_path)
+
+
+def open_path_list(
+    path: str
+) -> contextlib.AbstractContextManager[BinaryIO]:
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin.buffer)
+    else:
+        return open(path, 'rb')
 
 
 def main() -> int:
@@ -31,17 +154,70 @@ def main() -> int:
         metavar="PATTERN",
         dest='patterns',
     )
+    PARSER.add_argument(
+        '--paths-from',
+        help=(
+            "Read more paths from FILE. The paths in FILE should be "
+            "separated by newlines (or by null characters if --null is "
+            "used). Use - to read paths from standard input."
+        ),
+        metavar="FILE"
+    )
+    PARSER.add_argument(
+        '-z',
+        '--null',
+        action='store_const',
+        const=b'\0',
+        default=b'\n',
+        help=(
+            "The paths in the --paths-from file are separated by null "
+            "characters. See git-ls-files’s -z option."
+        ),
+        dest='delimiter'
+    )
+    PARSER.add_argument(
+        '--whole-index',
+        action='store_true',
+        help=(
+            "Check every path in the Git index. This assumes that the "
+            "current working directory is the root of a Git "
+            "repository. When using this option, set pass_filenames to "
+            "false in your pre-commit config."
+        )
+    )
     PARSER.add_argument(
         'paths',
-        nargs='+',
+        nargs='*',
         metavar="PATH"
     )
     ARGS: Final = PARSER.parse_args()
+    if (
+        len(ARGS.paths) == 0
+        and ARGS.paths_from is None
+        and not ARGS.whole_index
+    ):
+        PARSER.error("no paths were given.")
 
+    MATCHER: Final = PathMatcher(ARGS.patterns)
     exit_status: int = 0
-    for path in ARGS.paths:
-        for pattern in ARGS.patterns:
-            if pattern.match(path) is not None:
+    with contextlib.ExitStack() as stack:
+        paths: collections.abc.Iterable[str] = ARGS.paths
+        if ARGS.paths_from is not None:
+            PATH_LIST: Final = stack.enter_context(
+                open_path_list(ARGS.paths_from)
+            )
+            paths = itertools.chain(
+                paths,
+                read_delimited_paths(PATH_LIST, ARGS.delimiter)
+            )
+        if ARGS.whole_index:
+            paths = itertools.chain(
+                paths,
+                (path.as_posix() for path in paths_in_repo())
+            )
+        path: str
+        for path in paths:
+            for pattern in MATCHER.matching_patterns(path):
                 print(
                     f"ERROR: Path “{path}” matches this pattern:",
                     pattern.pattern,
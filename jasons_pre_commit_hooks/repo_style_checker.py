@@ -1,42 +1,95 @@
 # -*- coding: utf-8 -*-
 # SPDX-License-Identifier: CC0-1.0
-# SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-disable
+# SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
+# editorconfig-checker-enable
 import argparse
-import importlib.resources
+import fnmatch
+import functools
+import hashlib
+import io
+import json
+import os
 import pathlib
+import posixpath
 import re
+import stat
 import sys
 import textwrap
+import threading
+import time
 import warnings
-from collections.abc import Container, Iterable
-from typing import Any, Final, NamedTuple, Optional
-
-import yaml
-
-from . import init, paths_in_repo
-
-
-CHECK_IDS: Final = (
-    'copying.md exists',
-    'copying.md project name',
-    'copying.md correct text',
-    'README.md exists',
-    'README.md has <h1>',
-    'names match',
-    'README.md links to copying.md',
-    '.editorconfig exists',
-    '.editorconfig correct text',
-    '.pre-commit-config.yaml exists',
-    'README.md has hints',
-    'standard hints',
-    'standard hooks'
+from collections.abc import (
+    Callable,
+    Container,
+    Hashable,
+    Iterable,
+    Mapping,
+    Sequence,
+    Set
 )
-COPYING_PATH: Final = importlib.resources.files().joinpath("copying.md")
-COPYING_TEMPLATE: Final = (
-    COPYING_PATH
-    .read_text(encoding='utf_8')
-    .replace("Jason’s Pre-commit Hooks", "{}")
+from typing import (
+    Any,
+    Final,
+    NamedTuple,
+    Optional,
+    TextIO,
+    TypeVar,
+    cast
 )
+
+import dulwich.errors
+import dulwich.object_store
+import dulwich.objects
+import dulwich.objectspec
+
+from . import (
+    FileStamp,
+    default_job_count,
+    init,
+    map_in_parallel,
+    open_repo,
+    paths_in_repo,
+    positive_int,
+    read_cache,
+    read_repo_list,
+    without_ignored_paths,
+    write_cache
+)
+
+
+# The templates and yaml are only loaded once a check that needs them
+# runs. That way, commands like “repo-style-checker --help” start
+# faster. This maps the names of templates that have been loaded to
+# their contents.
+LOADED_TEMPLATES: Final[dict[str, str]] = {}
+TEMPLATE_NAMES: Final = ("copying.md", "editor_config.ini")
+
+
+def template(name: str) -> str:
+    if name not in LOADED_TEMPLATES:
+        import importlib.resources
+        LOADED_TEMPLATES[name] = (
+            importlib.resources.files()
+            .joinpath(name)
+            .read_text(encoding='utf_8')
+        )
+    return LOADED_TEMPLATES[name]
+
+
+def copying_template() -> str:
+    return template("copying.md").replace(
+        "Jason’s Pre-commit Hooks",
+        "{}"
+    )
+
+
+COPYING_PATH: Final = pathlib.Path('copying.md')
+README_PATH: Final = pathlib.Path('README.md')
+EDITOR_CONFIG_PATH: Final = pathlib.Path('.editorconfig')
+PC_CONFIG_PATH: Final = pathlib.Path(".pre-commit-config.yaml")
+COPYING_TITLE_PREFIX: Final = "# Copying Information for "
+H1_MARKER: Final = "# "
 COPYING_LINK: Final = \
 """## Copying
 
@@ -89,11 +142,8 @@ HINTS_FOR_CONTRIBUTORS_BY_PATH: Final = (
 )
 
 
-EDITOR_CONFIG_TEMPLATE: Final = (
-    importlib.resources.files()
-    .joinpath("editor_config.ini")
-    .read_text(encoding='utf_8')
-)
+def editor_config_template() -> str:
+    return template("editor_config.ini")
 
 
 # Pre-commit hooks shouldn’t mess with the files in the LICENSES/
@@ -243,8 +293,93 @@ def pre_commit_hook_ids() -> Iterable[str]:
             yield hook_id
 
 
-def print_no_file_error(path: pathlib.Path) -> None:
-    print(f"ERROR: There’s no {path} file.", file=sys.stderr)
+class GlobClassifier:
+    """
+    Figures out which globs match at least one path.
+
+    Globs get matched the same way that pathlib.PurePath.match() matches
+    them when case_sensitive is False. Globs that only have one part can
+    only ever match a path’s name, so they all get combined into a
+    single regex. That way, each path only gets looked at once, no
+    matter how many globs there are.
+    """
+    def __init__(self, globs: Iterable[str]) -> None:
+        self.name_globs: Final[list[str]] = []
+        self.other_globs: Final[list[str]] = []
+        glob: str
+        glob_path: pathlib.PurePath
+        for glob in dict.fromkeys(globs):
+            glob_path = pathlib.PurePath(glob)
+            if (
+                len(glob_path.parts) == 1
+                and not glob_path.is_absolute()
+            ):
+                self.name_globs.append(glob)
+            else:
+                self.other_globs.append(glob)
+
+    def matching_globs(
+        self,
+        paths: Iterable[pathlib.Path]
+    ) -> dict[str, pathlib.Path]:
+        """
+        Map each glob that matches a path to a path that it matches.
+        """
+        RESULT: Final[dict[str, pathlib.Path]] = {}
+        GLOB_COUNT: Final = len(self.name_globs) + len(self.other_globs)
+        remaining_name_globs: list[str] = list(self.name_globs)
+        name_pattern: Optional[re.Pattern[str]] = \
+            combined_name_pattern(remaining_name_globs)
+        path: pathlib.Path
+        match: Optional[re.Match[str]]
+        glob: str
+        for path in paths:
+            # A name can match more than one glob, but the regex only
+            # reports the first one. Once a glob has been found, it
+            # gets removed from the regex, and the name gets checked
+            # again.
+            while name_pattern is not None:
+                match = name_pattern.match(path.name)
+                if match is None:
+                    break
+                assert match.lastgroup is not None
+                glob = remaining_name_globs.pop(
+                    int(match.lastgroup.removeprefix('g'))
+                )
+                RESULT[glob] = path
+                name_pattern = \
+                    combined_name_pattern(remaining_name_globs)
+            for glob in self.other_globs:
+                if glob not in RESULT and path.match(
+                    glob,
+                    case_sensitive=False
+                ):
+                    RESULT[glob] = path
+            if len(RESULT) == GLOB_COUNT:
+                break
+        return RESULT
+
+
+def combined_name_pattern(
+    globs: Iterable[str]
+) -> Optional[re.Pattern[str]]:
+    """
+    Compile a regex that matches names that match any of the globs.
+
+    The name of the group that matches is “g” followed by the index of
+    the glob that matched.
+    """
+    ALTERNATIVES: Final = [
+        f"(?P<g{index}>{fnmatch.translate(glob)})"
+        for index, glob in enumerate(globs)
+    ]
+    if len(ALTERNATIVES) == 0:
+        return None
+    return re.compile("|".join(ALTERNATIVES), re.IGNORECASE)
+
+
+def print_no_file_error(path: pathlib.Path, output: TextIO) -> None:
+    print(f"ERROR: There’s no {path} file.", file=output)
 
 
 def extract_str_from_line_that_starts_with(
@@ -259,80 +394,143 @@ def extract_str_from_line_that_starts_with(
     return None
 
 
-def check_pc_config_hooks(
-    pre_commit_config: dict[Any, Any],
-    repo_info: PreCommitRepoInfo,
-    glob: str,
-    disabled_hooks: Container[str]
-) -> bool:
-    ACTUAL_VALUE: Final = "Its actual value was {}"
-    REPOS: Final = pre_commit_config.get('repos')
-    if not isinstance(REPOS, Iterable):
-        print(
-            "ERROR: The pre-commit config did not contain a key named",
-            "repos, or the repos key’s value wasn’t a list.",
-            ACTUAL_VALUE.format(REPOS),
-            file=sys.stderr
-        )
-        return False
+ACTUAL_VALUE: Final = "Its actual value was {}"
+class PreCommitConfigIndex:
+    """
+    A pre-commit config’s hooks, organized by repo URL and hook ID.
 
-    hooks_found: dict[str, bool] = {}
-    for hook_id in repo_info.hook_ids:
-        if hook_id not in disabled_hooks:
-            hooks_found[hook_id] = False
-    excludes_respected: bool = True
-    args_respected: bool = True
-    no_errors: bool = True
-    repo: Any
-    for repo in REPOS:
-        if not isinstance(repo, dict):
-            print(
-                "ERROR: One of the items on the pre-commit config’s",
-                "repos list was not a YAML mapping.",
-                ACTUAL_VALUE.format(repo),
-                file=sys.stderr
-            )
-            no_errors = False
-            continue
-        url: Any = repo.get('repo')
-        if not isinstance(url, str):
+    The config gets validated while it’s being indexed, so each problem
+    with it only gets reported once. A repo’s hooks lists only get
+    indexed and validated the first time that they’re looked up, so
+    repos that don’t need to be checked don’t cost anything extra.
+    """
+    def __init__(
+        self,
+        pre_commit_config: dict[Any, Any],
+        output: TextIO
+    ) -> None:
+        # Where errors get written to.
+        self.output: Final = output
+        # Maps repo URLs to the hooks lists for that URL.
+        self.hooks_lists: Final[dict[str, list[Any]]] = {}
+        # Maps repo URLs to hook IDs to every hook with that ID. Also
+        # stores whether or not the URL’s hooks lists were valid.
+        self.hooks: Final[
+            dict[str, tuple[bool, dict[str, list[dict[Any, Any]]]]]
+        ] = {}
+        self.has_repos: bool = True
+        self.no_errors: bool = True
+
+        REPOS: Final = pre_commit_config.get('repos')
+        if not isinstance(REPOS, Iterable):
             print(
-                "ERROR: In the pre-commit config, the URL for one of",
-                "the items on the repos list either wasn’t specified",
-                "wasn’t a string.",
-                ACTUAL_VALUE.format(url),
+                "ERROR: The pre-commit config did not contain a key",
+                "named repos, or the repos key’s value wasn’t a list.",
+                ACTUAL_VALUE.format(REPOS),
+                file=output
             )
-            no_errors = False
-            continue
-        if url != repo_info.url:
-            continue
-        hooks: Any = repo.get('hooks')
-        if not isinstance(hooks, Iterable):
-            print(
-                "ERROR: In the pre-commit config, the hooks list for",
-                f"<{url}> either wasn’t specified or wasn’t a string.",
-                ACTUAL_VALUE.format(hooks),
-                file=sys.stderr
+            self.has_repos = False
+            self.no_errors = False
+            return
+        repo: Any
+        url: Any
+        for repo in REPOS:
+            if not isinstance(repo, dict):
+                print(
+                    "ERROR: One of the items on the pre-commit",
+                    "config’s repos list was not a YAML mapping.",
+                    ACTUAL_VALUE.format(repo),
+                    file=output
+                )
+                self.no_errors = False
+                continue
+            url = repo.get('repo')
+            if not isinstance(url, str):
+                print(
+                    "ERROR: In the pre-commit config, the URL for one",
+                    "of the items on the repos list either wasn’t",
+                    "specified wasn’t a string.",
+                    ACTUAL_VALUE.format(url),
+                    file=output
+                )
+                self.no_errors = False
+                continue
+            self.hooks_lists.setdefault(url, []).append(
+                repo.get('hooks')
             )
-            no_errors = False
-            continue
+
+    def hooks_for(
+        self,
+        url: str
+    ) -> tuple[bool, dict[str, list[dict[Any, Any]]]]:
+        """
+        Look up a repo’s hooks by ID.
+
+        Returns whether or not the repo’s hooks lists were valid along
+        with the hooks.
+        """
+        if url in self.hooks:
+            return self.hooks[url]
+        valid: bool = True
+        HOOKS_BY_ID: Final[dict[str, list[dict[Any, Any]]]] = {}
+        hooks: Any
         hook: Any
-        for hook in hooks:
-            if not isinstance(hook, dict):
+        id: Any
+        for hooks in self.hooks_lists.get(url, ()):
+            if not isinstance(hooks, Iterable):
                 print(
-                    "ERROR: In the pre-commit config, one of the hooks",
-                    f"for <{url}> was not a YAML mapping.",
-                    ACTUAL_VALUE.format(hook),
-                    file=sys.stderr
+                    "ERROR: In the pre-commit config, the hooks list",
+                    f"for <{url}> either wasn’t specified or wasn’t a",
+                    "string.",
+                    ACTUAL_VALUE.format(hooks),
+                    file=self.output
                 )
-                no_errors = False
+                valid = False
                 continue
-            id: Any = hook.get('id')
-            if id not in repo_info.hook_ids:
-                # This is a hook that we don’t care about, so we can
-                # just ignore it.
-                continue
-            hooks_found[id] = True
+            for hook in hooks:
+                if not isinstance(hook, dict):
+                    print(
+                        "ERROR: In the pre-commit config, one of the",
+                        f"hooks for <{url}> was not a YAML mapping.",
+                        ACTUAL_VALUE.format(hook),
+                        file=self.output
+                    )
+                    valid = False
+                    continue
+                id = hook.get('id')
+                # Hooks with IDs that aren’t strings can’t match any of
+                # the hooks that we care about.
+                if isinstance(id, str):
+                    HOOKS_BY_ID.setdefault(id, []).append(hook)
+        self.hooks[url] = (valid, HOOKS_BY_ID)
+        return self.hooks[url]
+
+
+def check_pc_config_hooks(
+    config_index: PreCommitConfigIndex,
+    repo_info: PreCommitRepoInfo,
+    glob: str,
+    disabled_hooks: Container[str],
+    output: TextIO
+) -> bool:
+    if not config_index.has_repos:
+        return False
+    hooks_lists_valid: bool
+    hooks_by_id: dict[str, list[dict[Any, Any]]]
+    hooks_lists_valid, hooks_by_id = \
+        config_index.hooks_for(repo_info.url)
+    no_errors: bool = hooks_lists_valid and config_index.no_errors
+
+    url: Final = repo_info.url
+    all_hooks_found: bool = True
+    excludes_respected: bool = True
+    args_respected: bool = True
+    id: str
+    hook: dict[Any, Any]
+    for id in repo_info.hook_ids:
+        if id not in hooks_by_id and id not in disabled_hooks:
+            all_hooks_found = False
+        for hook in hooks_by_id.get(id, ()):
             if repo_info.exclude is not None:
                 exclude: Any = hook.get('exclude')
                 if not isinstance(exclude, str):
@@ -342,7 +540,7 @@ def check_pc_config_hooks(
                         "pattern or specified an exclude pattern that",
                         "wasn’t a string.",
                         ACTUAL_VALUE.format(exclude),
-                        file=sys.stderr
+                        file=output
                     )
                     no_errors = False
                     continue
@@ -353,7 +551,7 @@ def check_pc_config_hooks(
                         "exclude pattern. It should have been",
                         f"{repo_info.exclude}.",
                         ACTUAL_VALUE.format(exclude),
-                        file=sys.stderr
+                        file=output
                     )
                     excludes_respected = False
             if repo_info.args is not None:
@@ -365,7 +563,7 @@ def check_pc_config_hooks(
                         "list or set args to something other than a",
                         "list.",
                         ACTUAL_VALUE.format(args),
-                        file=sys.stderr
+                        file=output
                     )
                     no_errors = False
                     continue
@@ -377,19 +575,16 @@ def check_pc_config_hooks(
                             "ERROR: In the pre-commit config,",
                             f"<{url}>’s {id} hook did not specify",
                             f"this argument: {expected_arg}",
-                            file=sys.stderr
+                            file=output
                         )
                         args_respected = False
 
-    all_hooks_found: bool = True
-    for hook_found in hooks_found.values():
-        all_hooks_found = all_hooks_found and hook_found
     if not all_hooks_found:
         print(
             "ERROR: All of the standard pre-commit hooks for files",
             f"that match “{glob}” weren’t found. Here’s the hooks that",
             f"should have been found: {repo_info}",
-            file=sys.stderr
+            file=output
         )
     return (
         no_errors
@@ -415,6 +610,860 @@ def read_text_safe(path: pathlib.Path) -> Optional[str]:
         return None
 
 
+def normalized_pc_config(pre_commit_config: Any) -> Any:
+    """
+    Remove the parts of a pre-commit config that don’t get checked.
+
+    Only the repos list, each repo’s URL and hooks list and each hook’s
+    ID, exclude pattern and args are kept. Everything that
+    PreCommitConfigIndex would report as being invalid is kept as is,
+    so indexing the result reports the same errors as indexing the
+    original config.
+    """
+    if not isinstance(pre_commit_config, dict):
+        return pre_commit_config
+    REPOS: Final = pre_commit_config.get('repos')
+    if not isinstance(REPOS, Iterable):
+        return {'repos': REPOS}
+    return {'repos': [normalized_pc_repo(repo) for repo in REPOS]}
+
+
+def normalized_pc_repo(repo: Any) -> Any:
+    if not isinstance(repo, dict):
+        return repo
+    HOOKS: Final = repo.get('hooks')
+    return {
+        'repo': repo.get('repo'),
+        'hooks': (
+            [normalized_pc_hook(hook) for hook in HOOKS]
+            if isinstance(HOOKS, Iterable)
+            else HOOKS
+        )
+    }
+
+
+def normalized_pc_hook(hook: Any) -> Any:
+    if not isinstance(hook, dict):
+        return hook
+    return {
+        key: hook[key]
+        for key in ('id', 'exclude', 'args')
+        if key in hook
+    }
+
+
+def cache_name_for_repo(root: pathlib.Path, contents: str) -> str:
+    """
+    Return the name of one of a repo’s caches.
+    """
+    PATH: Final = os.fsencode(os.path.abspath(root))
+    return (
+        f"repo-style-checker-{contents}-"
+        f"{hashlib.sha256(PATH).hexdigest()}.json"
+    )
+
+
+# Linux gives up after following this many symlinks. See
+# <man:path_resolution(7)>.
+MAX_SYMLINKS_TO_FOLLOW: Final = 40
+Value = TypeVar('Value')
+class RepoSnapshot:
+    """
+    The parts of a repo that the checks look at.
+
+    Everything gets loaded the first time that it’s needed and then
+    reused. If rev is None, then the paths come from the repo’s index
+    and files are read from the working tree, since that’s what
+    pre-commit checks. Otherwise, the paths and files come straight
+    from the blobs in the commit or tree named rev, and the working
+    tree never gets touched. Looking up a rev that doesn’t exist raises
+    a KeyError.
+
+    Snapshots can be shared by checks that run in different threads.
+    """
+    def __init__(
+        self,
+        root: pathlib.Path,
+        ignore_patterns: Iterable[re.Pattern[str]] = (),
+        rev: Optional[str] = None,
+        use_cache: bool = True
+    ) -> None:
+        self.root: Final = root
+        self.ignore_patterns: Final = tuple(ignore_patterns)
+        self.use_cache: Final = use_cache
+        self.loaded: Final[dict[Hashable, Any]] = {}
+        self.locks: Final[dict[Hashable, threading.Lock]] = {}
+        self.locks_lock: Final = threading.Lock()
+        tree_id: Optional[dulwich.objects.ObjectID] = None
+        if rev is not None:
+            with open_repo(root) as repo:
+                tree_id = dulwich.objectspec.parse_tree(repo, rev).id
+        self.tree_id: Final = tree_id
+
+    def load(
+        self,
+        key: Hashable,
+        function: Callable[[], Value]
+    ) -> Value:
+        """
+        Call function the first time that key is loaded.
+
+        After that, the same value gets returned without calling
+        function again. If multiple threads load the same key at the
+        same time, then one of them calls function, and the others wait
+        for it to finish.
+        """
+        with self.locks_lock:
+            LOCK: Final = self.locks.setdefault(key, threading.Lock())
+        with LOCK:
+            if key not in self.loaded:
+                self.loaded[key] = function()
+        return cast(Value, self.loaded[key])
+
+    @property
+    def uses_working_tree(self) -> bool:
+        return self.tree_id is None
+
+    @property
+    def tree_entries(
+        self
+    ) -> dict[bytes, tuple[int, dulwich.objects.ObjectID]]:
+        """
+        Map the paths in rev’s tree to their modes and object IDs.
+        """
+        return self.load('tree entries', self.load_tree_entries)
+
+    def load_tree_entries(
+        self
+    ) -> dict[bytes, tuple[int, dulwich.objects.ObjectID]]:
+        assert self.tree_id is not None
+        with open_repo(self.root) as repo:
+            return {
+                entry.path: (entry.mode, entry.sha)
+                for entry in dulwich.object_store.iter_tree_contents(
+                    repo.object_store,
+                    self.tree_id
+                )
+                if entry.path is not None
+                and entry.mode is not None
+                and entry.sha is not None
+            }
+
+    def blob_id(
+        self,
+        path: pathlib.Path
+    ) -> Optional[dulwich.objects.ObjectID]:
+        """
+        Return the ID of the blob that has a file’s contents in rev’s
+        tree.
+
+        Symlinks get followed, just like they do when files are read
+        from the working tree. Returns None if the file doesn’t exist
+        or if it’s a symlink that doesn’t lead to another file in the
+        tree.
+        """
+        current: bytes = os.fsencode(path)
+        entry: Optional[tuple[int, dulwich.objects.ObjectID]]
+        target: bytes
+        for _ in range(MAX_SYMLINKS_TO_FOLLOW + 1):
+            entry = self.tree_entries.get(current)
+            if entry is None:
+                return None
+            elif not stat.S_ISLNK(entry[0]):
+                return entry[1]
+            with open_repo(self.root) as repo:
+                target = repo[entry[1]].as_raw_string()
+            if posixpath.isabs(target):
+                return None
+            current = posixpath.normpath(
+                posixpath.join(posixpath.dirname(current), target)
+            )
+            if current == b'..' or current.startswith(b'../'):
+                return None
+        return None
+
+    @property
+    def paths(self) -> Set[pathlib.Path]:
+        return self.load('paths', self.load_paths)
+
+    def load_paths(self) -> Set[pathlib.Path]:
+        if self.uses_working_tree:
+            return set(paths_in_repo(self.ignore_patterns, self.root))
+        return set(
+            without_ignored_paths(
+                self.tree_entries,
+                self.ignore_patterns
+            )
+        )
+
+    def read_text(self, path: pathlib.Path) -> Optional[str]:
+        """
+        Return a file’s contents or None if the file doesn’t exist.
+        """
+        return self.load(
+            ('text', path),
+            functools.partial(self.load_text, path)
+        )
+
+    def load_text(self, path: pathlib.Path) -> Optional[str]:
+        if self.uses_working_tree:
+            return read_text_safe(self.root / path)
+        BLOB_ID: Final = self.blob_id(path)
+        if BLOB_ID is None:
+            return None
+        with open_repo(self.root) as repo:
+            BLOB: Final = repo[BLOB_ID]
+        if not isinstance(BLOB, dulwich.objects.Blob):
+            return None
+        # pathlib.Path.read_text() translates newlines, so this has to
+        # as well.
+        return (
+            BLOB.as_raw_string()
+            .decode('utf_8')
+            .replace('\r\n', '\n')
+            .replace('\r', '\n')
+        )
+
+    @property
+    def copying_contents(self) -> Optional[str]:
+        return self.read_text(COPYING_PATH)
+
+    @property
+    def readme_contents(self) -> Optional[str]:
+        return self.read_text(README_PATH)
+
+    @property
+    def project_name(self) -> Optional[str]:
+        return self.load(
+            'project name',
+            lambda: extract_str_from_line_that_starts_with(
+                self.copying_contents,
+                COPYING_TITLE_PREFIX
+            )
+        )
+
+    @property
+    def readme_h1_contents(self) -> Optional[str]:
+        return self.load(
+            'README.md <h1>',
+            lambda: extract_str_from_line_that_starts_with(
+                self.readme_contents,
+                H1_MARKER
+            )
+        )
+
+    @property
+    def pre_commit_config(self) -> Any:
+        """
+        Return the pre-commit config or None if it’s missing.
+
+        The config gets run through normalized_pc_config(), so it only
+        contains the parts that PreCommitConfigIndex looks at.
+        """
+        return self.load('pre-commit config', self.load_pc_config)
+
+    def load_pc_config(self) -> Any:
+        CACHE_KEY: Final = self.pc_config_cache_key()
+        CACHE_NAME: Final = cache_name_for_repo(
+            self.root,
+            'pre-commit-config'
+        )
+        if CACHE_KEY is not None:
+            try:
+                DATA: Final = json.loads(read_cache(CACHE_NAME) or "{}")
+                if DATA.get('key') == CACHE_KEY:
+                    return DATA['config']
+            except (AttributeError, KeyError, ValueError):
+                pass
+
+        PC_CONFIG_CONTENTS: Final = self.read_text(PC_CONFIG_PATH)
+        if PC_CONFIG_CONTENTS is None:
+            return None
+        import yaml
+        # The C version of the loader is much faster, but it’s only
+        # available if PyYAML was built with libyaml.
+        LOADER: Final = (
+            yaml.CSafeLoader
+            if yaml.__with_libyaml__
+            else yaml.SafeLoader
+        )
+        PC_CONFIG: Final = normalized_pc_config(
+            yaml.load(PC_CONFIG_CONTENTS, Loader=LOADER)
+        )
+
+        # Some YAML values, like dates, can’t be stored as JSON. Others,
+        # like mappings with keys that aren’t strings, change when
+        # they’re stored as JSON. Configs like that don’t get cached.
+        if CACHE_KEY is not None:
+            try:
+                CACHE_CONTENTS: Final = json.dumps(
+                    {'key': CACHE_KEY, 'config': PC_CONFIG}
+                )
+            except (TypeError, ValueError):
+                pass
+            else:
+                if json.loads(CACHE_CONTENTS)['config'] == PC_CONFIG:
+                    write_cache(CACHE_NAME, CACHE_CONTENTS)
+        return PC_CONFIG
+
+    def pc_config_cache_key(self) -> Optional[list[Any]]:
+        """
+        Return something that changes whenever the pre-commit config
+        changes or None if the config shouldn’t be cached.
+        """
+        if not self.use_cache:
+            return None
+        if self.uses_working_tree:
+            STAMP: Final = FileStamp.of(self.root / PC_CONFIG_PATH)
+            if STAMP is None:
+                return None
+            return ['stamp', *STAMP]
+        BLOB_ID: Final = self.blob_id(PC_CONFIG_PATH)
+        if BLOB_ID is None:
+            return None
+        return ['blob', BLOB_ID.decode('ascii')]
+
+    @property
+    def matching_globs(self) -> dict[str, pathlib.Path]:
+        """
+        Map each standard glob that matches a path to that path.
+
+        The standard globs are the ones that are used to figure out
+        which hints and hooks a repo needs.
+        """
+        return self.load(
+            'matching globs',
+            lambda: GlobClassifier(
+                glob
+                for globs, _ in (
+                    *HINTS_FOR_CONTRIBUTORS_BY_PATH,
+                    *PRE_COMMIT_REPOS_BY_PATH
+                )
+                for glob in globs
+            ).matching_globs(self.paths)
+        )
+
+
+class CheckOptions(NamedTuple):
+    disabled_hooks: Container[str] = ()
+    line_ending: str = 'lf'
+    # Whether or not checks should fix the files that they complain
+    # about. Files are never fixed when a snapshot doesn’t use the
+    # working tree.
+    fix: bool = True
+
+
+def should_fix(snapshot: RepoSnapshot, options: CheckOptions) -> bool:
+    return options.fix and snapshot.uses_working_tree
+
+
+def fix_message(snapshot: RepoSnapshot, options: CheckOptions) -> str:
+    return " Fixing…" if should_fix(snapshot, options) else ""
+
+
+def readme_h1_error(snapshot: RepoSnapshot) -> str:
+    return (
+        "Make sure that there’s a line that looks like"
+        f" this:\n\n\t{H1_MARKER}{snapshot.project_name}\n"
+    )
+
+
+# Each check returns True if the repo passed it. Errors get written to
+# output instead of straight to stderr so that checks that run at the
+# same time don’t mix up their errors.
+def check_copying_exists(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if COPYING_PATH not in snapshot.paths:
+        print_no_file_error(COPYING_PATH, output)
+        return False
+    return True
+
+
+def check_copying_project_name(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if snapshot.project_name is None:
+        print(
+            "ERROR: Couldn’t automatically detect the project’s",
+            f"name by looking at {COPYING_PATH}. In order for",
+            f"autodetection to work, {COPYING_PATH} should contain",
+            "a line that looks like",
+            f"this:\n\n\t{COPYING_TITLE_PREFIX}<project-name>\n",
+            file=output
+        )
+        return False
+    return True
+
+
+def check_copying_text(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    EXPECTED_COPYING_INFO: Final = copying_template().format(
+        snapshot.project_name
+    )
+    if EXPECTED_COPYING_INFO != snapshot.copying_contents:
+        print(
+            f"ERROR: {COPYING_PATH} doesn’t match the standard",
+            f"copying info template.{fix_message(snapshot, options)}",
+            file=output
+        )
+        if should_fix(snapshot, options):
+            (snapshot.root / COPYING_PATH).write_text(
+                EXPECTED_COPYING_INFO,
+                encoding='utf_8'
+            )
+        return False
+    return True
+
+
+def check_readme_exists(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if README_PATH not in snapshot.paths:
+        print_no_file_error(README_PATH, output)
+        return False
+    return True
+
+
+def check_readme_h1(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if snapshot.readme_h1_contents is None:
+        print(
+            f"ERROR: There’s no <h1> in {README_PATH}.",
+            readme_h1_error(snapshot),
+            file=output
+        )
+        return False
+    return True
+
+
+def check_names_match(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if snapshot.readme_h1_contents != snapshot.project_name:
+        print(
+            f"ERROR: The project’s name in {README_PATH} does not",
+            f"match its name in {COPYING_PATH}.",
+            readme_h1_error(snapshot),
+            file=output
+        )
+        return False
+    return True
+
+
+def check_readme_copying_link(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    README_CONTENTS: Final = snapshot.readme_contents
+    if README_CONTENTS is None or COPYING_LINK not in README_CONTENTS:
+        COPYING_LINK_INDENTED: Final = textwrap.indent(
+            COPYING_LINK,
+            "\t"
+        )
+        print(
+            f"ERROR: {README_PATH} is missing a link to",
+            f"{COPYING_PATH}. Make sure that {README_PATH}",
+            f"contains the following:\n\n{COPYING_LINK_INDENTED}",
+            file=output
+        )
+        return False
+    return True
+
+
+def check_editor_config_exists(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if EDITOR_CONFIG_PATH not in snapshot.paths:
+        print_no_file_error(EDITOR_CONFIG_PATH, output)
+        return False
+    return True
+
+
+def check_editor_config_text(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    expected_editor_config: str = editor_config_template()
+    if options.line_ending == 'crlf':
+        expected_editor_config = expected_editor_config.replace(
+            "end_of_line = lf",
+            "end_of_line = crlf"
+        )
+    if snapshot.read_text(EDITOR_CONFIG_PATH) != expected_editor_config:
+        print(
+            f"ERROR: {EDITOR_CONFIG_PATH} doesn’t contain the",
+            f"standard {EDITOR_CONFIG_PATH}",
+            f"file.{fix_message(snapshot, options)}",
+            file=output
+        )
+        if should_fix(snapshot, options):
+            (snapshot.root / EDITOR_CONFIG_PATH).write_text(
+                expected_editor_config,
+                encoding='utf_8'
+            )
+        return False
+    return True
+
+
+def check_pc_config_exists(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if PC_CONFIG_PATH not in snapshot.paths:
+        print_no_file_error(PC_CONFIG_PATH, output)
+        return False
+    return True
+
+
+def check_readme_hints_section(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    README_CONTENTS: Final = snapshot.readme_contents
+    if (
+        README_CONTENTS is None
+        or HINTS_FOR_CONTRIBUTORS_HEADING not in README_CONTENTS
+    ):
+        print(
+            f"ERROR: {README_PATH} doesn’t have a “Hints for",
+            f"Contributors” section. Make sure that {README_PATH}",
+            f"contains this:\n\n\t{HINTS_FOR_CONTRIBUTORS_HEADING}",
+            file=output
+        )
+        return False
+    return True
+
+
+def check_standard_hints(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    README_CONTENTS: Final = snapshot.readme_contents
+    MATCHING_GLOBS: Final = snapshot.matching_globs
+    globs: Iterable[str]
+    hint: str
+    glob: str
+    any_errors: bool = False
+    for globs, hint in HINTS_FOR_CONTRIBUTORS_BY_PATH:
+        for glob in globs:
+            if glob in MATCHING_GLOBS:
+                if (
+                    README_CONTENTS is None
+                    or hint not in README_CONTENTS
+                ):
+                    hint_indented: str = textwrap.indent(hint, "\t")
+                    print(
+                        f"ERROR: {README_PATH} doesn’t contain this",
+                        f"hint for contributors:\n\n{hint_indented}\n",
+                        file=output
+                    )
+                    print(
+                        f"(glob {glob} matched by file",
+                        f"{MATCHING_GLOBS[glob]})",
+                        file=output
+                    )
+                    any_errors = True
+                break
+    return not any_errors
+
+
+def check_standard_hooks(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    output: TextIO
+) -> bool:
+    if snapshot.pre_commit_config is None:
+        print_no_file_error(PC_CONFIG_PATH, output)
+        return False
+    MATCHING_GLOBS: Final = snapshot.matching_globs
+    PC_CONFIG_INDEX: Final = PreCommitConfigIndex(
+        snapshot.pre_commit_config,
+        output
+    )
+    globs: Iterable[str]
+    repo_info: PreCommitRepoInfo
+    glob: str
+    missing_hooks: bool = False
+    for globs, repo_info in PRE_COMMIT_REPOS_BY_PATH:
+        for glob in globs:
+            if glob in MATCHING_GLOBS:
+                hooks_found: bool = check_pc_config_hooks(
+                    PC_CONFIG_INDEX,
+                    repo_info,
+                    glob,
+                    options.disabled_hooks,
+                    output
+                )
+                if not hooks_found:
+                    missing_hooks = True
+                break
+    return not missing_hooks
+
+
+class Check(NamedTuple):
+    run: Callable[[RepoSnapshot, CheckOptions, TextIO], bool]
+    # The IDs of the checks that have to pass before this check can
+    # run. Checks that are skipped count as passing.
+    dependencies: tuple[str, ...] = ()
+
+
+# Checks are listed in the order that they run in when --all isn’t
+# used. Dependencies always come before the checks that need them.
+CHECKS: Final = {
+    'copying.md exists': Check(check_copying_exists),
+    'copying.md project name': Check(
+        check_copying_project_name,
+        ('copying.md exists',)
+    ),
+    'copying.md correct text': Check(
+        check_copying_text,
+        ('copying.md project name',)
+    ),
+    'README.md exists': Check(check_readme_exists),
+    'README.md has <h1>': Check(
+        check_readme_h1,
+        ('README.md exists',)
+    ),
+    'names match': Check(
+        check_names_match,
+        ('copying.md project name', 'README.md has <h1>')
+    ),
+    'README.md links to copying.md': Check(
+        check_readme_copying_link,
+        ('README.md exists',)
+    ),
+    '.editorconfig exists': Check(check_editor_config_exists),
+    '.editorconfig correct text': Check(
+        check_editor_config_text,
+        ('.editorconfig exists',)
+    ),
+    '.pre-commit-config.yaml exists': Check(check_pc_config_exists),
+    'README.md has hints': Check(
+        check_readme_hints_section,
+        ('README.md exists',)
+    ),
+    'standard hints': Check(
+        check_standard_hints,
+        ('README.md has hints',)
+    ),
+    'standard hooks': Check(
+        check_standard_hooks,
+        ('.pre-commit-config.yaml exists',)
+    )
+}
+CHECK_IDS: Final = tuple(CHECKS)
+
+
+class CheckResult(NamedTuple):
+    # Either “passed”, “failed”, “skipped” or “blocked”. Checks are
+    # blocked when one of their dependencies doesn’t pass.
+    status: str
+    output: str = ""
+    seconds: float = 0.0
+
+
+def run_check(
+    id: str,
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    skip_list: Container[str],
+    dependency_results: Iterable[CheckResult]
+) -> CheckResult:
+    if not should_check_be_run(id, skip_list):
+        return CheckResult('skipped')
+    result: CheckResult
+    for result in dependency_results:
+        if result.status not in ('passed', 'skipped'):
+            return CheckResult('blocked')
+    OUTPUT: Final = io.StringIO()
+    START: Final = time.perf_counter()
+    PASSED: Final = CHECKS[id].run(snapshot, options, OUTPUT)
+    return CheckResult(
+        'passed' if PASSED else 'failed',
+        OUTPUT.getvalue(),
+        time.perf_counter() - START
+    )
+
+
+def run_all_checks(
+    snapshot: RepoSnapshot,
+    options: CheckOptions,
+    skip_list: Container[str]
+) -> dict[str, CheckResult]:
+    """
+    Run every check, even if some of them fail.
+
+    Checks that don’t depend on each other run at the same time in
+    different threads. Most of the time, that means that the checks
+    that only need small files don’t have to wait for the repo’s index
+    to be read.
+    """
+    import concurrent.futures
+    FUTURES: Final[
+        dict[str, concurrent.futures.Future[CheckResult]]
+    ] = {}
+    id: str
+    check: Check
+    # Checks get submitted in order, and dependencies always come
+    # first. A check that’s waiting for its dependencies can only be
+    # waiting on checks that a different thread already started.
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=len(CHECKS)
+    ) as executor:
+        for id, check in CHECKS.items():
+            FUTURES[id] = executor.submit(
+                lambda id, dependencies: run_check(
+                    id,
+                    snapshot,
+                    options,
+                    skip_list,
+                    (FUTURES[d].result() for d in dependencies)
+                ),
+                id,
+                check.dependencies
+            )
+        return {id: future.result() for id, future in FUTURES.items()}
+
+
+def print_timing_summary(results: dict[str, CheckResult]) -> None:
+    """
+    Print how long each check took, starting with the slowest one.
+
+    Files and the repo’s index only get loaded once, so their loading
+    time counts towards whichever checks needed them first.
+    """
+    print("Check timing:", file=sys.stderr)
+    id: str
+    result: CheckResult
+    for id, result in sorted(
+        results.items(),
+        key=lambda item: item[1].seconds,
+        reverse=True
+    ):
+        print(
+            f"{result.seconds:10.3f} s  {result.status:<7}  {id}",
+            file=sys.stderr
+        )
+
+
+def repo_record(
+    path: pathlib.Path,
+    ignore_patterns: Iterable[re.Pattern[str]],
+    rev: Optional[str],
+    use_cache: bool,
+    options: CheckOptions,
+    skip_list: Container[str],
+    templates: Mapping[str, str]
+) -> dict[str, Any]:
+    """
+    Run every check on a repo and describe the results in a form that
+    can be turned into JSON.
+
+    templates maps the names of templates to their contents. It gets
+    used instead of loading the templates again, since worker processes
+    don’t always inherit the templates that the main process loaded.
+    """
+    import yaml
+    LOADED_TEMPLATES.update(templates)
+    RECORD: Final[dict[str, Any]] = {"path": str(path)}
+    try:
+        RESULTS: Final = run_all_checks(
+            RepoSnapshot(path, ignore_patterns, rev, use_cache),
+            options,
+            skip_list
+        )
+    except (
+        dulwich.errors.NotGitRepository,
+        KeyError,
+        OSError,
+        ValueError,
+        yaml.YAMLError
+    ) as exception:
+        RECORD["error"] = f"{type(exception).__name__}: {exception}"
+        return RECORD
+    RECORD["passed"] = all(
+        result.status in ('passed', 'skipped')
+        for result in RESULTS.values()
+    )
+    RECORD["checks"] = {
+        id: result.status for id, result in RESULTS.items()
+    }
+    RECORD["errors"] = {
+        id: result.output
+        for id, result in RESULTS.items()
+        if len(result.output) > 0
+    }
+    return RECORD
+
+
+def check_repos(
+    paths: Sequence[pathlib.Path],
+    ignore_patterns: Iterable[re.Pattern[str]],
+    rev: Optional[str],
+    use_cache: bool,
+    options: CheckOptions,
+    skip_list: Container[str],
+    jobs: int
+) -> int:
+    """
+    Print a JSON record for each repo.
+
+    Returns 1 if any of the repos failed a check or couldn’t be
+    checked.
+    """
+    # The templates get sent to the worker processes so that every
+    # worker doesn’t have to load them again.
+    TEMPLATES: Final = {name: template(name) for name in TEMPLATE_NAMES}
+    exit_status: int = 0
+    record: dict[str, Any]
+    for record in map_in_parallel(
+        functools.partial(
+            repo_record,
+            ignore_patterns=tuple(ignore_patterns),
+            rev=rev,
+            use_cache=use_cache,
+            options=options,
+            skip_list=skip_list,
+            templates=TEMPLATES
+        ),
+        paths,
+        jobs
+    ):
+        print(json.dumps(record), flush=True)
+        if "error" in record:
+            print(
+                f"ERROR: Failed to check “{record['path']}”:",
+                record["error"],
+                file=sys.stderr
+            )
+            exit_status = 1
+        elif not record["passed"]:
+            exit_status = 1
+    return exit_status
+
+
 def main() -> int:
     init()
     ITEM_PREFIX: Final = "\n\t• "
@@ -493,193 +1542,122 @@ def main() -> int:
         ),
         metavar="REGEX_PATTERN"
     )
-    ARGS: Final = PARSER.parse_args()
-
-    PATHS: Final = set(
-        path for path in paths_in_repo(ARGS.ignore_path_pattern)
+    PARSER.add_argument(
+        '-a',
+        '--all',
+        action='store_true',
+        help=(
+            "Keep going after a check fails so that every problem gets "
+            "reported at once. Checks that don’t depend on each other "
+            "run at the same time. At the end, a summary of how long "
+            "each check took gets printed."
+        )
     )
-    COPYING_PATH: Final = pathlib.Path('copying.md')
-    COPYING_CONTENTS: Final = read_text_safe(COPYING_PATH)
-    TO_LOOK_FOR: Final = "# Copying Information for "
-    PROJECT_NAME: Final = extract_str_from_line_that_starts_with(
-        COPYING_CONTENTS,
-        TO_LOOK_FOR
+    PARSER.add_argument(
+        '-r',
+        '--rev',
+        help=(
+            "Check the files in a commit or tree instead of the files "
+            "in the working tree. For example, “--rev HEAD” checks the "
+            "last commit. When --rev is used, files that don’t follow "
+            "the style won’t be fixed."
+        ),
+        metavar="REVISION"
     )
-    README_PATH: Final = pathlib.Path('README.md')
-    EDITOR_CONFIG_PATH: Final = pathlib.Path('.editorconfig')
-    PC_CONFIG_PATH: Final = pathlib.Path(".pre-commit-config.yaml")
-    H1_MARKER: Final = "# "
-    README_CONTENTS: Final = read_text_safe(README_PATH)
-    README_H1_CONTENTS: Final = (
-        extract_str_from_line_that_starts_with(
-            README_CONTENTS,
-            H1_MARKER
-        )
+    PARSER.add_argument(
+        '--no-cache',
+        action='store_false',
+        help=(
+            "Parse the pre-commit config, even if it hasn’t changed "
+            "since the last time that it was parsed."
+        ),
+        dest='use_cache'
     )
-    README_H1_ERROR: Final = (
-        "Make sure that there’s a line that looks like"
-        f" this:\n\n\t{H1_MARKER}{PROJECT_NAME}\n"
+    PARSER.add_argument(
+        '--repos',
+        action='extend',
+        nargs='+',
+        type=pathlib.Path,
+        default=[],
+        help=(
+            "Check these repos instead of the current working "
+            "directory. Every check gets run on every repo, like with "
+            "--all, but files never get fixed. For each repo, a line "
+            "containing a JSON object gets printed. The object has the "
+            "repo’s path, whether or not the repo passed, the status "
+            "of each check and the errors from each check. If the repo "
+            "couldn’t be checked, then it has an error instead."
+        ),
+        metavar="DIR"
+    )
+    PARSER.add_argument(
+        '--repos-from',
+        help=(
+            "Like --repos, but read the paths of the repos from FILE, "
+            "one per line. Use - to read the paths from standard "
+            "input."
+        ),
+        metavar="FILE"
+    )
+    PARSER.add_argument(
+        '-j',
+        '--jobs',
+        default=default_job_count(),
+        type=positive_int,
+        help=(
+            "The maximum number of repos to check at the same time. "
+            "Only used with --repos and --repos-from. Defaults to the "
+            "number of CPUs."
+        ),
+        metavar="N"
     )
+    ARGS: Final = PARSER.parse_args()
 
-    if should_check_be_run('copying.md exists', ARGS.skip):
-        if COPYING_PATH not in PATHS:
-            print_no_file_error(COPYING_PATH)
-            return 1
-    if should_check_be_run('copying.md project name', ARGS.skip):
-        if PROJECT_NAME is None:
-            print(
-                "ERROR: Couldn’t automatically detect the project’s",
-                f"name by looking at {COPYING_PATH}. In order for",
-                f"autodetection to work, {COPYING_PATH} should contain",
-                "a line that looks like",
-                f"this:\n\n\t{TO_LOOK_FOR}<project-name>\n",
-                file=sys.stderr
-            )
-            return 1
-    if should_check_be_run('copying.md correct text', ARGS.skip):
-        EXPECTED_COPYING_INFO: Final = COPYING_TEMPLATE.format(
-            PROJECT_NAME
+    if len(ARGS.repos) > 0 or ARGS.repos_from is not None:
+        REPOS: Final = list(ARGS.repos)
+        if ARGS.repos_from is not None:
+            REPOS.extend(read_repo_list(ARGS.repos_from))
+        return check_repos(
+            REPOS,
+            ARGS.ignore_path_pattern,
+            ARGS.rev,
+            ARGS.use_cache,
+            CheckOptions(ARGS.disable_hook, ARGS.line_ending, False),
+            ARGS.skip,
+            ARGS.jobs
         )
-        if EXPECTED_COPYING_INFO != COPYING_CONTENTS:
-            print(
-                f"ERROR: {COPYING_PATH} doesn’t match the standard",
-                "copying info template. Fixing…",
-                file=sys.stderr
-            )
-            COPYING_PATH.write_text(
-                EXPECTED_COPYING_INFO,
-                encoding='utf_8'
-            )
-            return 1
-    if should_check_be_run('README.md exists', ARGS.skip):
-        if README_PATH not in PATHS:
-            print_no_file_error(README_PATH)
-            return 1
-    if should_check_be_run('README.md has <h1>', ARGS.skip):
-        if README_H1_CONTENTS is None:
-            print(
-                f"ERROR: There’s no <h1> in {README_PATH}.",
-                README_H1_ERROR,
-                file=sys.stderr
-            )
-            return 1
-    if should_check_be_run('names match', ARGS.skip):
-        if README_H1_CONTENTS != PROJECT_NAME:
-            print(
-                f"ERROR: The project’s name in {README_PATH} does not",
-                f"match its name in {COPYING_PATH}.",
-                README_H1_ERROR,
-                file=sys.stderr
-            )
-            return 1
-    if should_check_be_run('README.md links to copying.md', ARGS.skip):
-        if (
-            README_CONTENTS is None
-            or COPYING_LINK not in README_CONTENTS
-        ):
-            COPYING_LINK_INDENTED: Final = textwrap.indent(
-                COPYING_LINK,
-                "\t"
-            )
-            print(
-                f"ERROR: {README_PATH} is missing a link to",
-                f"{COPYING_PATH}. Make sure that {README_PATH}",
-                f"contains the following:\n\n{COPYING_LINK_INDENTED}",
-                file=sys.stderr
-            )
-            return 1
-    if should_check_be_run('.editorconfig exists', ARGS.skip):
-        if EDITOR_CONFIG_PATH not in PATHS:
-            print_no_file_error(EDITOR_CONFIG_PATH)
-            return 1
-    if should_check_be_run('.editorconfig correct text', ARGS.skip):
-        expected_editor_config: str = EDITOR_CONFIG_TEMPLATE
-        if ARGS.line_ending == 'crlf':
-            expected_editor_config = expected_editor_config.replace(
-                "end_of_line = lf",
-                "end_of_line = crlf"
-            )
-        EDITOR_CONFIG_CONTENTS: Final = \
-            read_text_safe(EDITOR_CONFIG_PATH)
-        if EDITOR_CONFIG_CONTENTS != expected_editor_config:
-            print(
-                f"ERROR: {EDITOR_CONFIG_PATH} doesn’t contain the",
-                f"standard {EDITOR_CONFIG_PATH} file. Fixing…",
-                file=sys.stderr
-            )
-            EDITOR_CONFIG_PATH.write_text(
-                expected_editor_config,
-                encoding='utf_8'
-            )
-            return 1
-    if should_check_be_run('.pre-commit-config.yaml exists', ARGS.skip):
-        if PC_CONFIG_PATH not in PATHS:
-            print_no_file_error(PC_CONFIG_PATH)
-            return 1
-    if should_check_be_run('README.md has hints', ARGS.skip):
-        if (
-            README_CONTENTS is None
-            or HINTS_FOR_CONTRIBUTORS_HEADING not in README_CONTENTS
-        ):
-            print(
-                f"ERROR: {README_PATH} doesn’t have a “Hints for",
-                f"Contributors” section. Make sure that {README_PATH}",
-                f"contains this:\n\n\t{HINTS_FOR_CONTRIBUTORS_HEADING}",
-                file=sys.stderr
-            )
-            return 1
-    if should_check_be_run('standard hints', ARGS.skip):
-        globs: Iterable[str]
-        hint: str
-        any_errors: bool = False
-        for globs, hint in HINTS_FOR_CONTRIBUTORS_BY_PATH:
-            path: pathlib.Path
-            for path in PATHS:
-                glob: str
-                for glob in globs:
-                    if path.match(glob, case_sensitive=False):
-                        if (
-                            README_CONTENTS is None
-                            or hint not in README_CONTENTS
-                        ):
-                            hint_indented: str = textwrap.indent(
-                                hint,
-                                "\t"
-                            )
-                            print(
-                                f"ERROR: {README_PATH} doesn’t contain",
-                                "this hint for",
-                                f"contributors:\n\n{hint_indented}\n",
-                                file=sys.stderr
-                            )
-                            print(
-                                f"(glob {glob} matched by file {path})",
-                                file=sys.stderr
-                            )
-                            any_errors = True
-                            break
-        if any_errors:
-            return 1
-    if should_check_be_run('standard hooks', ARGS.skip):
-        missing_hooks: bool = False
-        PC_CONFIG: Final = yaml.safe_load(
-            PC_CONFIG_PATH.read_text(encoding='utf_8')
+
+    try:
+        SNAPSHOT: Final = RepoSnapshot(
+            pathlib.Path.cwd(),
+            ARGS.ignore_path_pattern,
+            ARGS.rev,
+            ARGS.use_cache
         )
-        repo_info: PreCommitRepoInfo
-        for globs, repo_info in PRE_COMMIT_REPOS_BY_PATH:
-            for path in PATHS:
-                for glob in globs:
-                    if path.match(glob, case_sensitive=False):
-                        hooks_found: bool = check_pc_config_hooks(
-                            PC_CONFIG,
-                            repo_info,
-                            glob,
-                            ARGS.disable_hook
-                        )
-                        if not hooks_found:
-                            missing_hooks = True
-                        break
-        if missing_hooks:
-            return 1
+    except KeyError:
+        print(
+            f"ERROR: Couldn’t find a commit or tree named {ARGS.rev}.",
+            file=sys.stderr
+        )
+        return 1
+    OPTIONS: Final = CheckOptions(ARGS.disable_hook, ARGS.line_ending)
 
+    if ARGS.all:
+        RESULTS: Final = run_all_checks(SNAPSHOT, OPTIONS, ARGS.skip)
+        result: CheckResult
+        for result in RESULTS.values():
+            sys.stderr.write(result.output)
+        print_timing_summary(RESULTS)
+        if all(
+            result.status in ('passed', 'skipped')
+            for result in RESULTS.values()
+        ):
+            return 0
+        return 1
+    id: str
+    check: Check
+    for id, check in CHECKS.items():
+        if should_check_be_run(id, ARGS.skip):
+            if not check.run(SNAPSHOT, OPTIONS, sys.stderr):
+                return 1
     return 0
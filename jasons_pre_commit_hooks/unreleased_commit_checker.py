@@ -4,17 +4,36 @@
 # SPDX-FileCopyrightText: 2024, 2026 Jason Yundt <jason@jasonyundt.email>
 # editorconfig-checker-enable
 import argparse
+import collections.abc
 import datetime
+import functools
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import pathlib
+import sys
 from typing import Any, Final, NamedTuple, Optional, Self
 
 import dateutil.relativedelta
+import dulwich.errors
 import dulwich.objects
 import dulwich.refs
 import dulwich.repo
-import dulwich.walk
 import semver
 
-from . import init, open_cwd_as_repo
+from . import (
+    FileStamp,
+    default_job_count,
+    init,
+    map_in_parallel,
+    open_repo,
+    positive_int,
+    read_cache,
+    read_repo_list,
+    write_cache
+)
 
 
 # editorconfig-checker-disable
@@ -37,14 +56,8 @@ class TagForVersion:
         else:
             self.target = second_arg.get_peeled(ref)
 
-        self.version_number: Optional[semver.Version] = None
-        if self.name.startswith('v'):
-            version_number: str = self.name.removeprefix('v')
-            try:
-                self.version_number = \
-                    semver.Version.parse(version_number)
-            except ValueError:
-                pass
+        self.version_number: Optional[semver.Version] = \
+            version_number_in_tag_name(self.name)
 
     def __repr__(self) -> str:
         return (
@@ -74,49 +87,595 @@ class TagForVersion:
         return self.version_number is not None
 
 
+def version_number_in_tag_name(name: str) -> Optional[semver.Version]:
+    if name.startswith('v'):
+        try:
+            return semver.Version.parse(name.removeprefix('v'))
+        except ValueError:
+            pass
+    return None
+
+
+def tag_name_sort_key(
+    name: str
+) -> tuple[bool, semver.Version | str]:
+    """
+    Sort tag names the same way that TagForVersion objects get sorted.
+
+    Tags that don’t use semver come before tags that do. Tags that
+    don’t use semver get sorted by name.
+    """
+    VERSION_NUMBER: Final = version_number_in_tag_name(name)
+    if VERSION_NUMBER is None:
+        return False, name
+    else:
+        return True, VERSION_NUMBER
+
+
+class TagIndex:
+    """
+    Remembers which tag is the latest version between runs.
+
+    Peeling a tag and parsing its name as a version number are both
+    slow, and some repos have thousands of tags. This stores the names
+    of every tag and which one of them is the latest version. If the
+    refs haven’t changed since the last run, then the tags don’t even
+    get listed. Otherwise, only tags that were added since the last run
+    get parsed.
+    """
+    def __init__(self, repo: dulwich.repo.Repo, enabled: bool) -> None:
+        self.repo: Final = repo
+        self.enabled: Final = enabled
+        self.old: dict[str, Any] = {}
+        if enabled:
+            try:
+                DATA: Final = json.loads(
+                    read_cache(repo_cache_name(repo, 'tags')) or "{}"
+                )
+                if isinstance(DATA, dict):
+                    self.old = DATA
+            except ValueError:
+                pass
+
+    def latest_version(self) -> str:
+        """
+        Return the name of the tag for the latest version.
+        """
+        REFS_STATE: Final = tag_refs_state(self.repo)
+        OLD_LATEST: Final = self.old.get('latest')
+        OLD_TAGS: Final = self.old.get('tags')
+        if (
+            not isinstance(OLD_LATEST, str)
+            or not isinstance(OLD_TAGS, list)
+        ):
+            return self.update(REFS_STATE, (), None)
+        elif (
+            REFS_STATE is not None
+            and self.old.get('refs_state') == REFS_STATE
+        ):
+            return OLD_LATEST
+        else:
+            return self.update(REFS_STATE, OLD_TAGS, OLD_LATEST)
+
+    def update(
+        self,
+        refs_state: Optional[list[Any]],
+        old_tags: collections.abc.Iterable[str],
+        old_latest: Optional[str]
+    ) -> str:
+        TAGS: Final = [
+            name.decode(encoding='utf_8')
+            for name in self.repo.refs.keys(
+                base=dulwich.refs.Ref(TAG_REF_PREFIX)
+            )
+        ]
+        # old_latest was the latest version out of old_tags, so only
+        # tags that weren’t in old_tags could be later than it.
+        candidates: collections.abc.Iterable[str]
+        if old_latest is not None and old_latest in TAGS:
+            OLD_TAGS: Final = frozenset(old_tags)
+            candidates = [
+                old_latest,
+                *(name for name in TAGS if name not in OLD_TAGS)
+            ]
+        else:
+            candidates = TAGS
+        LATEST: Final = max(candidates, key=tag_name_sort_key)
+        if self.enabled:
+            NEW: Final = {
+                'refs_state': refs_state,
+                'tags': TAGS,
+                'latest': LATEST
+            }
+            if NEW != self.old:
+                write_cache(
+                    repo_cache_name(self.repo, 'tags'),
+                    json.dumps(NEW)
+                )
+        return LATEST
+
+
+def tag_refs_state(repo: dulwich.repo.Repo) -> Optional[list[Any]]:
+    """
+    Return something that changes whenever a tag gets created, deleted
+    or moved.
+
+    Git updates refs by renaming files, so this uses the stamps of the
+    packed-refs file and of every directory that contains loose tags.
+    Returns None if one of the stamps can’t be trusted.
+    """
+    COMMON_DIR: Final = pathlib.Path(repo.commondir())
+    PATHS: Final = [COMMON_DIR / 'packed-refs']
+    directory: str
+    for directory, _, _ in os.walk(COMMON_DIR / 'refs' / 'tags'):
+        PATHS.append(pathlib.Path(directory))
+    RESULT: Final[list[Any]] = []
+    path: pathlib.Path
+    stamp: Optional[FileStamp]
+    for path in PATHS:
+        if not path.exists():
+            RESULT.append([str(path)])
+            continue
+        stamp = FileStamp.of(path)
+        if stamp is None:
+            return None
+        RESULT.append([str(path), *stamp])
+    return RESULT
+
+
+class CommitInfo(NamedTuple):
+    """
+    The parts of a commit that are needed to walk the commit graph.
+    """
+    parents: tuple[dulwich.objects.ObjectID, ...]
+    commit_time: int
+    commit_timezone: int
+
+
+# The maximum number of commits that get saved in a CommitGraph’s cache.
+MAX_CACHED_COMMITS: Final = 10_000
+# The number of commits that get looked at after every commit that’s
+# left is reachable from exclude. Git does the same thing in case some
+# of the commit times are out of order.
+EXTRA_COMMITS: Final = 5
+
+
+class CommitGraph:
+    """
+    Information about a repo’s commits that gets saved between runs.
+
+    Parsing commit objects is slow, so the commits that were looked at
+    during the last run get loaded from the cache instead of being
+    parsed again. Only those commits get saved, so the cache stays
+    about as small as the part of the history that gets walked.
+    """
+    def __init__(self, repo: dulwich.repo.Repo, enabled: bool) -> None:
+        self.repo: Final = repo
+        self.enabled: Final = enabled
+        # Entries from the cache stay in their JSON form until they’re
+        # needed.
+        self.cached: dict[str, Any] = {}
+        self.commits: dict[dulwich.objects.ObjectID, CommitInfo] = {}
+        self.changed: bool = False
+        if enabled:
+            try:
+                DATA: Final = json.loads(
+                    read_cache(repo_cache_name(repo, 'commits'))
+                    or "{}"
+                )
+                if isinstance(DATA, dict) and isinstance(
+                    DATA.get('commits'),
+                    dict
+                ):
+                    self.cached = DATA['commits']
+            except ValueError:
+                pass
+
+    def known(self, commit_id: dulwich.objects.ObjectID) -> bool:
+        """
+        Check if a commit’s CommitInfo is available without parsing it.
+        """
+        if commit_id in self.commits:
+            return True
+        ENTRY: Final = self.cached.get(commit_id.decode('ascii'))
+        if ENTRY is None:
+            return False
+        parents: Any
+        commit_time: Any
+        commit_timezone: Any
+        try:
+            parents, commit_time, commit_timezone = ENTRY
+            self.commits[commit_id] = CommitInfo(
+                tuple(parent.encode('ascii') for parent in parents),
+                int(commit_time),
+                int(commit_timezone)
+            )
+        except (AttributeError, TypeError, ValueError):
+            del self.cached[commit_id.decode('ascii')]
+            return False
+        return True
+
+    def info(self, commit_id: dulwich.objects.ObjectID) -> CommitInfo:
+        """
+        Return information about a commit, parsing it if necessary.
+        """
+        if not self.known(commit_id):
+            self.commits[commit_id] = CommitInfo(*self.parse(commit_id))
+            self.changed = True
+        return self.commits[commit_id]
+
+    def parse(
+        self,
+        commit_id: dulwich.objects.ObjectID
+    ) -> tuple[tuple[dulwich.objects.ObjectID, ...], int, int]:
+        COMMIT: Final = self.repo[commit_id]
+        assert isinstance(COMMIT, dulwich.objects.Commit)
+        # In shallow clones, some parents aren’t in the object store.
+        # Those commits get treated like root commits.
+        PARENTS: Final = tuple(
+            parent
+            for parent in COMMIT.parents
+            if parent in self.repo.object_store
+        )
+        return PARENTS, COMMIT.commit_time, COMMIT.commit_timezone
+
+    def reachable_from_only(
+        self,
+        include: dulwich.objects.ObjectID,
+        exclude: dulwich.objects.ObjectID,
+        exact: bool = True
+    ) -> collections.abc.Iterator[CommitInfo]:
+        """
+        Yield the commits that are reachable from include but not from
+        exclude.
+
+        This walks the graph the same way that “git log include
+        ^exclude” does. Newer commits get looked at first, and the walk
+        stops once every commit that’s left is reachable from exclude,
+        so the history behind exclude doesn’t get looked at. The
+        commits get yielded newest first.
+
+        If exact is False, then each commit gets yielded as soon as
+        it’s looked at instead of after the walk is done. That way,
+        callers that stop early don’t have to wait for the whole walk,
+        but if commit times are out of order, then commits that are
+        reachable from exclude can get yielded.
+        """
+        # Maps commits that have been queued to whether or not they’re
+        # known to be reachable from exclude.
+        EXCLUDED: Final[dict[dulwich.objects.ObjectID, bool]] = {}
+        QUEUE: Final[list[tuple[int, dulwich.objects.ObjectID]]] = []
+        # The commits that have been popped, in the order that they were
+        # popped in.
+        POPPED: Final[dict[dulwich.objects.ObjectID, None]] = {}
+        # The number of queued commits that aren’t excluded.
+        included_in_queue: int = 0
+
+        def enqueue(
+            commit_id: dulwich.objects.ObjectID,
+            excluded: bool
+        ) -> None:
+            nonlocal included_in_queue
+            if commit_id not in EXCLUDED:
+                EXCLUDED[commit_id] = excluded
+                heapq.heappush(
+                    QUEUE,
+                    (-self.info(commit_id).commit_time, commit_id)
+                )
+                if not excluded:
+                    included_in_queue += 1
+            elif excluded:
+                exclude_ancestors(commit_id)
+
+        def exclude_ancestors(
+            commit_id: dulwich.objects.ObjectID
+        ) -> None:
+            # If commit times are out of order, then a commit can be
+            # popped before it turns out to be reachable from exclude.
+            # Its parents have already been queued, so they need to be
+            # excluded too.
+            nonlocal included_in_queue
+            TO_EXCLUDE: Final = [commit_id]
+            current: dulwich.objects.ObjectID
+            while len(TO_EXCLUDE) > 0:
+                current = TO_EXCLUDE.pop()
+                if EXCLUDED[current]:
+                    continue
+                EXCLUDED[current] = True
+                if current in POPPED:
+                    TO_EXCLUDE.extend(self.commits[current].parents)
+                else:
+                    included_in_queue -= 1
+
+        enqueue(include, False)
+        enqueue(exclude, True)
+        extra_commits_left: int = EXTRA_COMMITS
+        commit_id: dulwich.objects.ObjectID
+        parent: dulwich.objects.ObjectID
+        while len(QUEUE) > 0:
+            if included_in_queue == 0:
+                if extra_commits_left == 0:
+                    break
+                extra_commits_left -= 1
+            _, commit_id = heapq.heappop(QUEUE)
+            POPPED[commit_id] = None
+            if not EXCLUDED[commit_id]:
+                included_in_queue -= 1
+                if not exact:
+                    yield self.commits[commit_id]
+            for parent in self.commits[commit_id].parents:
+                enqueue(parent, EXCLUDED[commit_id])
+        if exact:
+            for commit_id in POPPED:
+                if not EXCLUDED[commit_id]:
+                    yield self.commits[commit_id]
+
+    def save(self) -> None:
+        """
+        Save the commits that were looked at during this run.
+        """
+        SAVED_COUNT: Final = min(len(self.commits), MAX_CACHED_COMMITS)
+        if self.enabled and (
+            self.changed or SAVED_COUNT != len(self.cached)
+        ):
+            # Newer commits get looked at first, so they’re the ones
+            # that get kept.
+            write_cache(
+                repo_cache_name(self.repo, 'commits'),
+                json.dumps({
+                    'commits': {
+                        commit_id.decode('ascii'): [
+                            [
+                                parent.decode('ascii')
+                                for parent in info.parents
+                            ],
+                            info.commit_time,
+                            info.commit_timezone
+                        ]
+                        for commit_id, info in itertools.islice(
+                            self.commits.items(),
+                            SAVED_COUNT
+                        )
+                    }
+                })
+            )
+
+
+def repo_cache_name(repo: dulwich.repo.Repo, contents: str) -> str:
+    """
+    Return the name of one of a repo’s caches.
+    """
+    PATH: Final = os.fsencode(os.path.abspath(repo.path))
+    return (
+        f"unreleased-commit-checker-{contents}-"
+        f"{hashlib.sha256(PATH).hexdigest()}.json"
+    )
+
+
+class ReleaseThresholds(NamedTuple):
+    """
+    Limits that cause a release to be required once they’re reached.
+    """
+    # The number of unreleased commits.
+    max_commits: int = 30
+    # The age of the oldest unreleased commit.
+    max_age_months: int = 3
+
+
 age_of_oldest_type = Optional[dateutil.relativedelta.relativedelta]
 class UnreleasedCommitStats(NamedTuple):
     amount: int
     age_of_oldest: age_of_oldest_type
+    # If this is False, then not every unreleased commit was looked at.
+    # amount is a lower bound, and age_of_oldest is the age of the
+    # oldest commit that was looked at.
+    exact: bool = True
 
     @classmethod
-    def from_cwd(cls) -> Self:
+    def from_cwd(
+        cls,
+        use_cache: bool = True,
+        exact: bool = True,
+        thresholds: ReleaseThresholds = ReleaseThresholds()
+    ) -> Self:
+        """
+        Count the unreleased commits in the current working directory.
+        """
+        return cls.from_repo(
+            pathlib.Path.cwd(),
+            use_cache,
+            exact,
+            thresholds
+        )
+
+    @classmethod
+    def from_repo(
+        cls,
+        path: pathlib.Path,
+        use_cache: bool = True,
+        exact: bool = True,
+        thresholds: ReleaseThresholds = ReleaseThresholds()
+    ) -> Self:
+        """
+        Count the unreleased commits in a repo.
+
+        If exact is False, then this stops counting as soon as it knows
+        that a release is required.
+        """
+        NOW: Final = datetime.datetime.now(datetime.timezone.utc)
+        amount: int = 0
+        # The commit time and time zone of the oldest unreleased commit.
+        oldest: Optional[tuple[int, int]] = None
+
         repo: dulwich.repo.Repo
-        with open_cwd_as_repo() as repo:
-            # editorconfig-checker-disable
-            REFS: Final[dict[dulwich.refs.Ref, dulwich.objects.ObjectID]] = \
-                repo.get_refs()
-            # editorconfig-checker-enable
-            TAGS: Final = (
-                TagForVersion(ref, repo)
-                for ref in REFS
-                if is_tag(ref)
-            )
-            LATEST_VERSION: Final[TagForVersion] = max(TAGS)
+        with open_repo(path) as repo:
             MAIN_HEAD: Final[dulwich.objects.ObjectID] = \
-                REFS[dulwich.refs.Ref(b'refs/heads/main')]
-            UNRELEASED_COMMIT_WALKER: Final = repo.get_walker(
-                include=[MAIN_HEAD],
-                exclude=[LATEST_VERSION.target]
+                repo.refs[dulwich.refs.Ref(b'refs/heads/main')]
+            LATEST_VERSION: Final = \
+                TagIndex(repo, use_cache).latest_version()
+            LATEST_VERSION_REF: Final = tag_name_to_ref(LATEST_VERSION)
+            SAVED_STATS: Final = SavedStats(
+                repo,
+                use_cache,
+                MAIN_HEAD,
+                LATEST_VERSION,
+                repo.refs[dulwich.refs.Ref(LATEST_VERSION_REF)]
             )
-            UNRELEASED_COMMIT_LOG: Final = tuple(
-                UNRELEASED_COMMIT_WALKER
+            # If neither main nor the tag moved, then the commits don’t
+            # need to be looked at again.
+            if SAVED_STATS.found:
+                amount = SAVED_STATS.amount
+                oldest = SAVED_STATS.oldest
+                if SAVED_STATS.exact:
+                    return cls.from_oldest(NOW, amount, oldest, True)
+                elif not exact and cls.from_oldest(
+                    NOW,
+                    amount,
+                    oldest,
+                    False
+                ).release_required(thresholds):
+                    return cls.from_oldest(NOW, amount, oldest, False)
+                amount = 0
+                oldest = None
+
+            LATEST_VERSION_TARGET: Final = \
+                TagForVersion(
+                    dulwich.refs.Ref(LATEST_VERSION_REF),
+                    repo
+                ).target
+            COMMIT_GRAPH: Final = CommitGraph(repo, use_cache)
+            complete: bool = True
+            info: CommitInfo
+            for info in COMMIT_GRAPH.reachable_from_only(
+                MAIN_HEAD,
+                LATEST_VERSION_TARGET,
+                exact
+            ):
+                amount += 1
+                if oldest is None or info.commit_time < oldest[0]:
+                    oldest = (info.commit_time, info.commit_timezone)
+                if not exact and cls.from_oldest(
+                    NOW,
+                    amount,
+                    oldest,
+                    False
+                ).release_required(thresholds):
+                    complete = False
+                    break
+            COMMIT_GRAPH.save()
+            SAVED_STATS.save(amount, oldest, complete)
+        return cls.from_oldest(NOW, amount, oldest, complete)
+
+    @classmethod
+    def from_oldest(
+        cls,
+        now: datetime.datetime,
+        amount: int,
+        oldest: Optional[tuple[int, int]],
+        exact: bool
+    ) -> Self:
+        """
+        Create stats from the commit time and time zone of the oldest
+        unreleased commit.
+        """
+        return cls(
+            amount=amount,
+            age_of_oldest=(
+                None
+                if oldest is None
+                else dateutil.relativedelta.relativedelta(
+                    now,
+                    commit_date(*oldest)
+                )
+            ),
+            exact=exact
+        )
+
+    def release_required(
+        self,
+        thresholds: ReleaseThresholds = ReleaseThresholds()
+    ) -> bool:
+        if self.age_of_oldest is None:
+            return False
+        else:
+            return (
+                self.amount >= thresholds.max_commits
+                or is_age_too_big(
+                    self.age_of_oldest,
+                    thresholds.max_age_months
+                )
             )
-            AMOUNT: Final = len(UNRELEASED_COMMIT_LOG)
-            age_of_oldest: age_of_oldest_type
+
+
+class SavedStats:
+    """
+    The stats from the last time that a repo was checked.
+
+    The stats only get used if main and the latest version’s tag still
+    point to the same objects, so checking them doesn’t require reading
+    any objects.
+    """
+    def __init__(
+        self,
+        repo: dulwich.repo.Repo,
+        enabled: bool,
+        main_head: dulwich.objects.ObjectID,
+        latest_version: str,
+        latest_version_id: dulwich.objects.ObjectID
+    ) -> None:
+        self.repo: Final = repo
+        self.enabled: Final = enabled
+        self.refs: Final = [
+            main_head.decode('ascii'),
+            latest_version,
+            latest_version_id.decode('ascii')
+        ]
+        self.found: bool = False
+        self.amount: int = 0
+        self.oldest: Optional[tuple[int, int]] = None
+        self.exact: bool = False
+        if enabled:
             try:
-                OLDEST_UNRELEASED_COMMIT: Final = \
-                    UNRELEASED_COMMIT_LOG[-1].commit
-                age_of_oldest = dateutil.relativedelta.relativedelta(
-                    datetime.datetime.now(datetime.timezone.utc),
-                    commit_date(OLDEST_UNRELEASED_COMMIT)
+                DATA: Final = json.loads(
+                    read_cache(repo_cache_name(repo, 'stats')) or "{}"
                 )
-            except IndexError:
-                age_of_oldest = None
-        return cls(
-            amount=AMOUNT,
-            age_of_oldest=age_of_oldest
-        )
+                if DATA.get('refs') == self.refs:
+                    self.amount = int(DATA['amount'])
+                    self.oldest = (
+                        None
+                        if DATA['oldest'] is None
+                        else (
+                            int(DATA['oldest'][0]),
+                            int(DATA['oldest'][1])
+                        )
+                    )
+                    self.exact = bool(DATA['exact'])
+                    self.found = True
+            except (
+                AttributeError,
+                IndexError,
+                KeyError,
+                TypeError,
+                ValueError
+            ):
+                pass
+
+    def save(
+        self,
+        amount: int,
+        oldest: Optional[tuple[int, int]],
+        exact: bool
+    ) -> None:
+        if self.enabled:
+            write_cache(
+                repo_cache_name(self.repo, 'stats'),
+                json.dumps({
+                    'refs': self.refs,
+                    'amount': amount,
+                    'oldest': oldest,
+                    'exact': exact
+                })
+            )
 
 
 def is_tag(ref: bytes) -> bool:
@@ -131,13 +690,13 @@ def tag_name_to_ref(name: str) -> bytes:
     return TAG_REF_PREFIX + name.encode(encoding='utf_8')
 
 
-def commit_date(commit: dulwich.objects.Commit) -> datetime.datetime:
-    OFFSET: Final = datetime.timedelta(seconds=commit.commit_timezone)
+def commit_date(
+    commit_time: int,
+    commit_timezone: int
+) -> datetime.datetime:
+    OFFSET: Final = datetime.timedelta(seconds=commit_timezone)
     TIME_ZONE: Final = datetime.timezone(OFFSET)
-    return datetime.datetime.fromtimestamp(
-        commit.commit_time,
-        tz=TIME_ZONE
-    )
+    return datetime.datetime.fromtimestamp(commit_time, tz=TIME_ZONE)
 
 
 def age_to_str(age: dateutil.relativedelta.relativedelta) -> str:
@@ -157,9 +716,90 @@ def age_to_str(age: dateutil.relativedelta.relativedelta) -> str:
         return f"{age.microseconds} microseconds"
 
 
-def is_age_too_big(age: dateutil.relativedelta.relativedelta) -> bool:
+def is_age_too_big(
+    age: dateutil.relativedelta.relativedelta,
+    max_months: int = ReleaseThresholds().max_age_months
+) -> bool:
     NORMALIZED_AGE: Final = age.normalized()
-    return NORMALIZED_AGE.years > 0 or NORMALIZED_AGE.months >= 3
+    return (
+        NORMALIZED_AGE.years * 12 + NORMALIZED_AGE.months >= max_months
+    )
+
+
+def repo_record(
+    path: pathlib.Path,
+    use_cache: bool,
+    exact: bool,
+    thresholds: ReleaseThresholds
+) -> dict[str, Any]:
+    """
+    Describe a repo’s unreleased commits in a form that can be turned
+    into JSON.
+    """
+    RECORD: Final[dict[str, Any]] = {"path": str(path)}
+    try:
+        STATS: Final = \
+            UnreleasedCommitStats.from_repo(
+                path,
+                use_cache,
+                exact,
+                thresholds
+            )
+    except (
+        dulwich.errors.NotGitRepository,
+        KeyError,
+        OSError,
+        ValueError
+    ) as exception:
+        RECORD["error"] = f"{type(exception).__name__}: {exception}"
+        return RECORD
+    RECORD["amount"] = STATS.amount
+    RECORD["age_of_oldest"] = (
+        None
+        if STATS.age_of_oldest is None
+        else age_to_str(STATS.age_of_oldest)
+    )
+    RECORD["exact"] = STATS.exact
+    RECORD["release_required"] = STATS.release_required(thresholds)
+    return RECORD
+
+
+def check_repos(
+    paths: collections.abc.Sequence[pathlib.Path],
+    use_cache: bool,
+    exact: bool,
+    thresholds: ReleaseThresholds,
+    jobs: int
+) -> int:
+    """
+    Print a JSON record for each repo.
+
+    Returns 1 if any of the repos needs a release or couldn’t be
+    checked.
+    """
+    exit_status: int = 0
+    record: dict[str, Any]
+    for record in map_in_parallel(
+        functools.partial(
+            repo_record,
+            use_cache=use_cache,
+            exact=exact,
+            thresholds=thresholds
+        ),
+        paths,
+        jobs
+    ):
+        print(json.dumps(record), flush=True)
+        if "error" in record:
+            print(
+                f"ERROR: Failed to check “{record['path']}”:",
+                record["error"],
+                file=sys.stderr
+            )
+            exit_status = 1
+        elif record["release_required"]:
+            exit_status = 1
+    return exit_status
 
 
 def main() -> int:
@@ -170,26 +810,111 @@ def main() -> int:
             "an error if a release needs to be made."
         )
     )
-    # This command doesn’t take any arguments, so this just makes sure
-    # that --help works and that errors are produced if arguments are
-    # given.
-    PARSER.parse_args()
-
-    STATS: Final = UnreleasedCommitStats.from_cwd()
-    print(f"There are {STATS.amount} unreleased commits.")
-    release_required: bool
-    if STATS.age_of_oldest is None:
-        release_required = False
-    else:
+    PARSER.add_argument(
+        '--no-cache',
+        action='store_false',
+        help=(
+            "Parse every commit, even if it was already parsed the "
+            "last time that unreleased-commit-checker was run."
+        ),
+        dest='use_cache'
+    )
+    PARSER.add_argument(
+        '--exact',
+        action='store_true',
+        help=(
+            "Count every unreleased commit and find the oldest one. By "
+            "default, unreleased-commit-checker stops looking at "
+            "commits as soon as it knows that a release is required."
+        )
+    )
+    PARSER.add_argument(
+        '--repos',
+        action='extend',
+        nargs='+',
+        type=pathlib.Path,
+        default=[],
+        help=(
+            "Check these repos instead of the current working "
+            "directory. For each repo, a line containing a JSON object "
+            "gets printed. The object has the repo’s path, the number "
+            "of unreleased commits, the age of the oldest unreleased "
+            "commit and whether or not a release is required. If the "
+            "repo couldn’t be checked, then it has an error instead."
+        ),
+        metavar="DIR"
+    )
+    PARSER.add_argument(
+        '--repos-from',
+        help=(
+            "Like --repos, but read the paths of the repos from FILE, "
+            "one per line. Use - to read the paths from standard "
+            "input."
+        ),
+        metavar="FILE"
+    )
+    PARSER.add_argument(
+        '-j',
+        '--jobs',
+        default=default_job_count(),
+        type=positive_int,
+        help=(
+            "The maximum number of repos to check at the same time. "
+            "Defaults to the number of CPUs."
+        ),
+        metavar="N"
+    )
+    PARSER.add_argument(
+        '--max-commits',
+        default=ReleaseThresholds().max_commits,
+        type=positive_int,
+        help=(
+            "Require a release once there are at least N unreleased "
+            "commits. Defaults to %(default)s."
+        ),
+        metavar="N"
+    )
+    PARSER.add_argument(
+        '--max-age',
+        default=ReleaseThresholds().max_age_months,
+        type=positive_int,
+        help=(
+            "Require a release once the oldest unreleased commit is at "
+            "least MONTHS months old. Defaults to %(default)s."
+        ),
+        metavar="MONTHS"
+    )
+    ARGS: Final = PARSER.parse_args()
+    THRESHOLDS: Final = \
+        ReleaseThresholds(ARGS.max_commits, ARGS.max_age)
+
+    if len(ARGS.repos) > 0 or ARGS.repos_from is not None:
+        REPOS: Final = list(ARGS.repos)
+        if ARGS.repos_from is not None:
+            REPOS.extend(read_repo_list(ARGS.repos_from))
+        return check_repos(
+            REPOS,
+            ARGS.use_cache,
+            ARGS.exact,
+            THRESHOLDS,
+            ARGS.jobs
+        )
+
+    STATS: Final = UnreleasedCommitStats.from_cwd(
+        ARGS.use_cache,
+        ARGS.exact,
+        THRESHOLDS
+    )
+    AT_LEAST: Final = "" if STATS.exact else "at least "
+    print(f"There are {AT_LEAST}{STATS.amount} unreleased commits.")
+    if STATS.age_of_oldest is not None:
         print(
-            "The oldest unreleased commit is",
-            age_to_str(STATS.age_of_oldest),
-            "old."
+            f"The oldest unreleased commit is {AT_LEAST}"
+            f"{age_to_str(STATS.age_of_oldest)} old."
         )
-        release_required = \
-            STATS.amount >= 30 or is_age_too_big(STATS.age_of_oldest)
-    if release_required:
+    RELEASE_REQUIRED: Final = STATS.release_required(THRESHOLDS)
+    if RELEASE_REQUIRED:
         print("It’s time to do a release.")
     else:
         print("It’s not time to do a release yet.")
-    return release_required
+    return RELEASE_REQUIRED
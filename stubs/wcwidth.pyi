@@ -3,6 +3,14 @@
 # SPDX-FileCopyrightText: 2024 Jason Yundt <jason@jasonyundt.email>
 
 
+def wcwidth(wc: str) -> int:
+    """
+    See wcwidth’s documentation.
+
+    <https://wcwidth.readthedocs.io/en/latest/api.html#wcwidth.wcwidth>
+    """
+
+
 def wcswidth(pwcs: str) -> int:
     """
     See wcwidth’s documentation.